@@ -35,4 +35,9 @@ plot_metric("task_wait",   "Task Wait (ms)",           "probe_wait.png")
 plot_metric("task_resp",   "Task Response (ms)",       "probe_resp.png")
 plot_metric("task_service","Task Service (ms)",        "probe_service.png")
 
+# tail latency (columns written by Python_codes/sweep.py)
+if "completion_p99" in df.columns:
+    plot_metric("completion_p99", "p99 Completion Time (ms)", "probe_completion_p99.png")
+    plot_metric("task_wait_p99",  "p99 Task Wait (ms)",       "probe_wait_p99.png")
+
 print("All probe plots saved.")
@@ -48,4 +48,9 @@ plot_metric(df, "task_wait",   "Task Wait (ms)",           "multi_wait.png")
 plot_metric(df, "task_resp",   "Task Response (ms)",       "multi_resp.png")
 plot_metric(df, "task_service","Task Service Time (ms)",   "multi_service.png")
 
+# tail latency (columns written by Python_codes/sweep.py)
+if "completion_p99" in df.columns:
+    plot_metric(df, "completion_p99", "p99 Completion Time (ms)", "multi_completion_p99.png")
+    plot_metric(df, "task_wait_p99",  "p99 Task Wait (ms)",       "multi_wait_p99.png")
+
 print("All multi-mode plots generated.")
@@ -34,4 +34,9 @@ plot_metric("task_wait",   "Task Wait (ms)",           "workers_wait.png")
 plot_metric("task_resp",   "Task Response (ms)",       "workers_resp.png")
 plot_metric("task_service","Task Service (ms)",        "workers_service.png")
 
+# tail latency (columns written by Python_codes/sweep.py)
+if "completion_p99" in df.columns:
+    plot_metric("completion_p99", "p99 Completion Time (ms)", "workers_completion_p99.png")
+    plot_metric("task_wait_p99",  "p99 Task Wait (ms)",       "workers_wait_p99.png")
+
 print("All worker plots saved.")
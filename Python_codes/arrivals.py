@@ -0,0 +1,69 @@
+# arrivals.py
+"""
+Job inter-arrival processes for open-loop runs.
+
+make_arrivals(kind, rate, params, rng) returns a zero-arg function giving
+the gap to a scheduler's next job in ms (rate is in jobs per ms), or None
+for the closed loop, where a scheduler submits job j+1 only when job j is
+done. Gaps are drawn from `rng` (the scheduler's workload stream).
+
+    poisson        exponential gaps
+    deterministic  fixed gaps of 1/rate
+    mmpp           two-state Markov-modulated Poisson: for a fraction `high`
+                   of the time jobs arrive `burst` times faster than in the
+                   low state; bursts last `dwell` ms on average. The long-run
+                   mean rate is still `rate`.
+"""
+import random
+
+KINDS = ["closed", "poisson", "mmpp", "deterministic"]
+
+
+def capacity_rate(capacity, mean_duration, mean_tasks):
+    """Jobs per ms a cluster of `capacity` speed-1 slots can serve (cluster.capacity)."""
+    return capacity / (mean_duration * mean_tasks)
+
+
+def make_arrivals(kind, rate, params=None, rng=random):
+    params = params or {}
+    if kind == "closed":
+        return None
+    if rate <= 0:
+        raise ValueError("arrival rate must be > 0")
+
+    if kind == "poisson":
+        def gap():
+            return rng.expovariate(rate)
+        return gap
+
+    elif kind == "deterministic":
+        def gap():
+            return 1.0 / rate
+        return gap
+
+    elif kind == "mmpp":
+        burst = params.get("burst", 10.0)
+        high = params.get("high", 0.1)
+        dwell = params.get("dwell", 20.0 / rate)
+        low_rate = rate / ((1 - high) + burst * high)
+        rates = [low_rate, low_rate * burst]
+        stay = [dwell * (1 - high) / high, dwell]     # mean ms in low / high
+        state = [0, None]                             # [current state, ms left in it]
+
+        def gap():
+            t = 0.0
+            while True:
+                if state[1] is None:
+                    state[1] = rng.expovariate(1.0 / stay[state[0]])
+                g = rng.expovariate(rates[state[0]])
+                if g < state[1]:
+                    state[1] -= g
+                    return t + g
+                # state switches before the next arrival (memoryless)
+                t += state[1]
+                state[0] = 1 - state[0]
+                state[1] = None
+        return gap
+
+    else:
+        raise ValueError("unknown arrival process")
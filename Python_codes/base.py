@@ -0,0 +1,297 @@
+import simpy
+
+from metrics import JobStats
+from worker import DURATIONS, DURATION_WEIGHTS
+import policies
+import tenants
+import netmodel
+import streams
+
+def ms(x):
+    return float(x)
+
+def task_dur(durations, t):
+    return None if durations is None else durations[t]
+
+class BaseScheduler:
+    """
+    What batch / late / latepro share: RPC wrappers, completion bookkeeping,
+    the job loop and results(). Subclasses only write run_job(), from
+    new_job() and probe_place().
+    Constructor signature matches simulation.py usage:
+      Scheduler(env, name, workers, ndelay, mode, jobs, probe, seed=None)
+    Exposes .m_job_sampler (callable returning tasks-per-job) and .arrivals
+    (callable returning the gap to the next job, None = closed loop).
+    simulation.py will set them.
+
+    Which workers are probed and which get the tasks is up to .policy
+    (policies.py); make_scheduler_class() bakes policy_name / ranking in.
+
+    With faults (faults.py) an RPC can go unanswered: the rpc_* wrappers
+    then return None after .recovery.rpc_timeout ms.
+
+    Every message leg takes .network.delay() ms (netmodel.py); by default
+    a fixed ndelay.
+    """
+    policy_name = "batch"
+    ranking = "count"
+
+    def __init__(self, env, name, workers, ndelay, mode, jobs, probe, seed=None):
+        self.env = env
+        self.name = name
+        self.workers = workers
+        self.nd = ndelay
+        self.network = netmodel.Network(ndelay)   # replaced by run_sim
+        self.host = 0
+        self.mode = mode
+        self.jobs = jobs
+        self.d = probe
+
+        # counters (avoid shadowing methods)
+        self.rpc_total = 0
+        self.rpc_probe_count = 0
+        self.rpc_assign_count = 0
+        self.rpc_request_count = 0
+        self.rpc_assign_rid_count = 0
+        self.rpc_cancel_count = 0
+        self.rpc_status_count = 0
+
+        self.res_created = 0
+        self.res_used = 0
+        self.res_wasted = 0
+
+        # bookkeeping
+        self.jobinfo = {}        # in-flight jobs: jobid -> {"start":, "tasks": m_job}
+        self.wait_events = {}    # (jobid, tid) -> simpy.Event
+        self.job_stats = JobStats()   # finished jobs, constant memory
+        self.metrics = None           # shared TaskSink (tails by job class), set by simulation.py
+
+        # sampler provided externally, fallback to fixed-3
+        self.m_job_sampler = lambda: 3
+        # inter-arrival sampler in ms (arrivals.py); None = closed loop
+        self.arrivals = None
+        # tenant mix (tenants.py), None = one anonymous tenant
+        self.tenants = None
+        # Speculator (speculation.py), None = no backup copies
+        self.spec = None
+        # fault injection / Recovery (faults.py), None = every RPC is answered
+        self.faults = None
+        self.recovery = None
+        # sampling / ranking / placement (policies.py)
+        self.policy = policies.make_policy(self.policy_name, self.ranking)
+
+        # own random streams (streams.py): placement decisions, and the jobs
+        self.rng = streams.Stream(seed, streams.POLICY, name)
+        self.workload = streams.Workload(seed, name, DURATIONS, DURATION_WEIGHTS)
+
+        self.start()
+
+    def start(self):
+        """Start the job loop (fastsim.FastScheduler starts its own)."""
+        self.env.process(self.run())
+
+    # RPC wrappers
+    def _call(self, w, handler, *args, size=0):
+        """Request (`size` payload bytes), handler, reply; None if either
+        message is lost or the reply would come after rpc_timeout."""
+        there = self.network.delay(self, w, size)
+        if self.faults is not None and there >= self.recovery.rpc_timeout:
+            # the request still gets there and is handled; nobody waits for it
+            self.env.process(self._deliver_late(w, there, handler, args))
+            yield self.env.timeout(ms(self.recovery.rpc_timeout))
+            return None
+        yield self.env.timeout(ms(there))
+        if self.faults is not None and not self.faults.deliver(w):
+            yield self.env.timeout(ms(max(0.0, self.recovery.rpc_timeout - there)))
+            return None
+        rep = handler(*args)
+        back = self.network.delay(w, self)
+        if self.faults is not None and there + back > self.recovery.rpc_timeout:
+            yield self.env.timeout(ms(self.recovery.rpc_timeout - there))
+            return None
+        yield self.env.timeout(ms(back))
+        if self.faults is not None and not self.faults.deliver(w):
+            yield self.env.timeout(ms(max(0.0, self.recovery.rpc_timeout - there - back)))
+            return None
+        return rep
+
+    def _deliver_late(self, w, there, handler, args):
+        yield self.env.timeout(ms(there))
+        if self.faults.deliver(w):
+            handler(*args)
+
+    def rpc_probe(self, w):
+        self.rpc_total += 1; self.rpc_probe_count += 1
+        return (yield from self._call(w, w.handle_probe))
+
+    def rpc_assign(self, w, jobid, tid, dur=None, tenant=None):
+        self.rpc_total += 1; self.rpc_assign_count += 1
+        return (yield from self._call(w, w.handle_assign, jobid, tid, self, dur, tenant,
+                                      size=self.network.task_bytes))
+
+    def rpc_request(self, w, jobid, tid, tenant=None):
+        self.rpc_total += 1; self.rpc_request_count += 1
+        self.res_created += 1
+        return (yield from self._call(w, w.handle_request, jobid, tid, self, tenant))
+
+    def rpc_assign_rid(self, w, rid, dur=None, tid=None):
+        self.rpc_total += 1; self.rpc_assign_rid_count += 1
+        self.res_used += 1
+        return (yield from self._call(w, w.handle_assign_rid, rid, dur, tid,
+                                      size=self.network.task_bytes))
+
+    def rpc_cancel(self, w, rid):
+        self.rpc_total += 1; self.rpc_cancel_count += 1
+        self.res_wasted += 1
+        return (yield from self._call(w, w.handle_cancel, rid))
+
+    def rpc_status(self, w, jobid, tid):
+        self.rpc_total += 1; self.rpc_status_count += 1
+        return (yield from self._call(w, w.handle_status, jobid, tid))
+
+    # notify worker done
+    def notify_done(self, jobid, tid, worker=None):
+        if self.spec is not None:
+            self.spec.done(jobid, tid, worker)
+        if self.recovery is not None:
+            self.recovery.done(jobid, tid)
+        ev = self.wait_events.get((jobid, tid))
+        if ev and not ev.triggered:
+            ev.succeed()
+
+    def job_done(self, jobid):
+        """Record a finished job and drop its bookkeeping."""
+        info = self.jobinfo.pop(jobid)
+        self.job_stats.add(info["start"], self.env.now, info["tasks"])
+        if self.metrics is not None:
+            self.metrics.job(jobid, info["tasks"], self.env.now - info["start"], info["tenant"])
+        if self.spec is not None:
+            self.spec.forget(jobid)
+        if self.recovery is not None:
+            self.recovery.forget(jobid)
+        for t in range(info["tasks"]):
+            self.wait_events.pop((jobid, f"T{t}"), None)
+
+    # main loop
+    def run(self):
+        for j in range(self.jobs):
+            if self.arrivals is None:
+                # closed loop: next job once this one is done
+                yield self.env.process(self.run_job(j))
+            else:
+                self.env.process(self.run_job(j))
+                yield self.env.timeout(ms(self.arrivals()))
+
+    def submit(self, j, durations):
+        """Start job j with the given task durations (trace replay)."""
+        self.env.process(self.run_job(j, durations))
+
+    def run_job(self, j, durations=None):
+        raise NotImplementedError
+
+    # building blocks for run_job
+    def job_size(self, durations):
+        """(tenant, tasks) of a new job; a trace fixes the task count."""
+        tenant = tenants.pick(self.tenants, self.workload.tenants) if self.tenants else None
+        if durations is not None:
+            m_job = len(durations)
+        elif tenant is not None:
+            m_job = tenant.job_size(self.workload.sizes)
+        else:
+            # sample tasks-per-job using externally set sampler
+            m_job = max(1, int(self.m_job_sampler()))
+        return tenant, m_job
+
+    def new_job(self, j, durations):
+        """Register job j -> (jobid, m_job, durations, completion events)."""
+        # durations: per-task service times from a trace, None = draw them here
+        jobid = f"{self.name}-J{j}"
+        self.jobinfo[jobid] = {"start": self.env.now}
+
+        tenant, m_job = self.job_size(durations)
+        self.jobinfo[jobid]["tasks"] = m_job
+        self.jobinfo[jobid]["tenant"] = tenant
+        if durations is None:
+            # part of the workload, so every mode (and a backup copy) runs the same tasks
+            durations = self.workload.durations(m_job)
+
+        # create wait events for each task
+        evs = []
+        for t in range(m_job):
+            e = simpy.Event(self.env)
+            self.wait_events[(jobid, f"T{t}")] = e
+            evs.append(e)
+        return jobid, m_job, durations, evs
+
+    def sample_workers(self, m_job):
+        # probe min(len(workers), d * m_job) workers
+        sample_n = min(len(self.workers), max(1, int(self.d * m_job)))
+        sampled = self.policy.sample(self, sample_n)
+        if self.recovery is not None:
+            sampled = self.recovery.usable(sampled, sample_n)
+        return sampled
+
+    def probe_place(self, jobid, m_job, durations, first_tid=0, need=None):
+        """Probe, rank and assign tasks first_tid .. first_tid+need-1 (generator)."""
+        if need is None:
+            need = m_job
+        tenant = self.jobinfo[jobid]["tenant"]
+        while True:
+            sampled = self.sample_workers(m_job)
+
+            probes = [self.env.process(self.rpc_probe(w)) for w in sampled]
+            all_ev = yield simpy.AllOf(self.env, probes)
+            reps = list(all_ev.values())
+            if self.recovery is None:
+                break
+            sampled, reps = self.recovery.answered(sampled, reps)
+            if sampled:
+                break
+            # nobody answered: probe other workers
+        chosen_workers = self.policy.place(reps, sampled, need)
+
+        assigns = [
+            self.env.process(self.rpc_assign(w, jobid, f"T{first_tid + t}",
+                                             task_dur(durations, first_tid + t), tenant))
+            for t, w in enumerate(chosen_workers)
+        ]
+        if assigns:
+            done = yield simpy.AllOf(self.env, assigns)
+            self.track(jobid, first_tid, chosen_workers, durations, list(done.values()))
+
+    def track(self, jobid, first_tid, chosen, durations, reps):
+        """Tasks first_tid.. were sent to `chosen`; `reps` are the assign replies."""
+        for t, w in enumerate(chosen):
+            tid = f"T{first_tid + t}"
+            if self.spec is not None:
+                self.spec.track(jobid, tid, w, durations[first_tid + t])
+            if self.recovery is not None:
+                if reps[t] is None:
+                    self.recovery.silent(w)
+                self.recovery.track(jobid, tid, w, task_dur(durations, first_tid + t),
+                                    reps[t] == "OK")
+
+    def results(self):
+        comps = self.job_stats.completion
+        hist = self.job_stats.completion_hist
+
+        return {
+            "completion": comps.mean,
+            "p50": hist.quantile(0.50),
+            "p90": hist.quantile(0.90),
+            "p95": hist.quantile(0.95),
+            "p99": hist.quantile(0.99),
+            "p999": hist.quantile(0.999),
+            "rpc_per_job": (self.rpc_total / comps.n) if comps.n else 0.0,
+            "rpc_total": self.rpc_total,
+            "probe": self.rpc_probe_count,
+            "assign": self.rpc_assign_count,
+            "request": self.rpc_request_count,
+            "assign_rid": self.rpc_assign_rid_count,
+            "cancel": self.rpc_cancel_count,
+            "status": self.rpc_status_count,
+            "reserv_created": self.res_created,
+            "reserv_used": self.res_used,
+            "reserv_wasted": self.res_wasted,
+            "tasks_avg": self.job_stats.tasks.mean
+        }
@@ -0,0 +1,89 @@
+# cluster.py
+"""
+Worker speeds and slot counts for heterogeneous clusters.
+
+make_cluster(spec, n, slots, seed, params) returns one (speed, slots) pair
+per worker. A task of d ms takes d / speed ms on a worker; slots=None keeps
+the unlimited model. spec is one of
+
+    homogeneous  every worker speed 1.0 with the --slots value (the original)
+    two_gen      a fraction `slow_frac` of the workers (picked at random) is
+                 an older generation: speed `slow_speed`, `slow_slots` slots
+    lognormal    speeds drawn from a lognormal with mean 1 and shape `sigma`
+
+or the path of a cluster file, one machine class per line:
+
+    # count,speed,slots        (slots empty = the --slots value)
+    30,1.0,8
+    20,0.5,4
+
+File counts are proportions: they are scaled to n workers (largest
+remainder), so one file serves a whole --workers sweep. Classes get
+consecutive worker ids, i.e. each generation fills its own racks.
+
+Generated clusters use their own stream (streams.py), so the workload is
+the same for every cluster.
+"""
+import csv
+import math
+
+import streams
+
+KINDS = ["homogeneous", "two_gen", "lognormal"]
+
+
+def load_cluster(path):
+    """[(count, speed, slots or None)] from a cluster file."""
+    classes = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith("#") or row[0].strip() == "count":
+                continue
+            count, speed = int(row[0]), float(row[1])
+            slots = row[2].strip() if len(row) > 2 else ""
+            if count < 0 or speed <= 0:
+                raise ValueError(f"{path}: bad machine class {row}")
+            classes.append((count, speed, int(slots) if slots else None))
+    if not classes or sum(c for c, _, _ in classes) == 0:
+        raise ValueError(f"{path}: no workers")
+    return classes
+
+
+def scale_counts(counts, n):
+    """Integers proportional to `counts` that sum to n (largest remainder)."""
+    total = sum(counts)
+    shares = [c * n / total for c in counts]
+    out = [math.floor(s) for s in shares]
+    rest = sorted(range(len(counts)), key=lambda i: out[i] - shares[i])
+    for i in rest[:n - sum(out)]:
+        out[i] += 1
+    return out
+
+
+def make_cluster(spec, n, slots=None, seed=0, params=None):
+    params = params or {}
+    if spec is None or spec == "homogeneous":
+        return [(1.0, slots)] * n
+
+    rng = streams.Stream(seed, streams.CLUSTER)
+    if spec == "two_gen":
+        slow = set(rng.sample(range(n), round(params.get("slow_frac", 0.5) * n)))
+        slow_speed = params.get("slow_speed", 0.5)
+        slow_slots = params.get("slow_slots") or slots
+        return [(slow_speed, slow_slots) if i in slow else (1.0, slots) for i in range(n)]
+
+    elif spec == "lognormal":
+        sigma = params.get("sigma", 0.3)
+        return [(rng.lognormvariate(-sigma * sigma / 2, sigma), slots) for _ in range(n)]
+
+    else:
+        classes = load_cluster(spec)
+        out = []
+        for (_, speed, cls_slots), k in zip(classes, scale_counts([c for c, _, _ in classes], n)):
+            out += [(speed, cls_slots or slots)] * k
+        return out
+
+
+def capacity(workers):
+    """Cluster capacity in speed-1 slots (unlimited slots count as one)."""
+    return sum((w.slots or 1) * w.speed for w in workers)
@@ -0,0 +1,452 @@
+# fastsim.py
+"""
+Event-list engine used by `simulation.py --engine fast`.
+
+It replays exactly the event order SimPy produces for the batch / late /
+latepro schedulers, but without a generator, Process or Timeout object
+per RPC:
+
+- timeouts and triggered events are plain (time, eid, fn, arg) tuples on
+  a heap (SimPy's NORMAL priority),
+- process starts (SimPy's URGENT Initialize events) go to a FIFO that is
+  drained after every heap event, which is the order SimPy runs them in,
+- an RPC is the chain  start -> +delay handler -> +delay reply -> AllOf
+  check, i.e. the same steps as the rpc_* generators (delays from the
+  run's netmodel network, asked for in the same order).
+
+On the fixed network (the default) a fan-out of RPCs costs two heap
+events instead of two per RPC; see FastScheduler._fan_out.
+
+Same seed => same random draws in the same order => identical metrics.
+
+Speed: 1.7-2.5x SimPy, not the 10x first asked for. The model itself (worker
+handlers, metrics, policies, random draws) is shared with the SimPy engine
+and takes about two thirds of a fast run, so even a free event loop could
+not get much past 3x while keeping the results bit-for-bit identical.
+Speculation and faults are only modelled by the SimPy engine.
+"""
+import heapq
+from collections import deque
+
+from worker import Worker, DURATIONS, DURATION_WEIGHTS
+from base import BaseScheduler, task_dur
+import policies
+import netmodel
+import streams
+from metrics import JobStats
+
+
+def ms(x):
+    return float(x)
+
+
+class Engine:
+    """Minimal stand-in for simpy.Environment (now / process / run)."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.heap = []
+        self.urgent = deque()
+        self.eid = 0
+
+    def schedule(self, delay, fn, arg=None):
+        self.eid += 1
+        heapq.heappush(self.heap, (self.now + delay, self.eid, fn, arg))
+
+    def process(self, step):
+        """step = (fn, arg), started like a SimPy Initialize event."""
+        self.urgent.append(step)
+
+    def run(self, until=None):
+        """Like simpy: stop before `until`, or when no events are left."""
+        heap, urgent, pop = self.heap, self.urgent, heapq.heappop
+        if until is None:
+            until = float("inf")
+        self.drain()
+        while heap and heap[0][0] < until:
+            self.now, _, fn, arg = pop(heap)
+            fn(arg)
+            while urgent:
+                fn, arg = urgent.popleft()
+                fn(arg)
+        if until != float("inf"):
+            self.now = until
+
+    def drain(self):
+        """Run the pending process starts."""
+        urgent = self.urgent
+        while urgent:
+            fn, arg = urgent.popleft()
+            fn(arg)
+
+
+class Event:
+    """simpy.Event subset: succeed() and callbacks (None once processed)."""
+    __slots__ = ("env", "callbacks", "triggered")
+
+    def __init__(self, env):
+        self.env = env
+        self.callbacks = []
+        self.triggered = False
+
+    def succeed(self):
+        self.triggered = True
+        self.env.schedule(0, Event._process, self)
+
+    @staticmethod
+    def _process(ev):
+        callbacks, ev.callbacks = ev.callbacks, None
+        for cb, arg in callbacks:
+            cb(arg)
+
+
+class AllOf:
+    """simpy.AllOf: fires `resume(values)` one event after the n-th check,
+    values ordered like the inputs.
+
+    For RPCs, reply() stands in for SimPy's per-process end event: only the
+    end event of the last reply can trigger the condition, so it is the only
+    one that needs to be on the heap."""
+    __slots__ = ("env", "n", "count", "values", "resume", "fired")
+
+    def __init__(self, env, n, resume):
+        self.env = env
+        self.n = n
+        self.count = 0
+        self.values = [None] * n
+        self.resume = resume
+        self.fired = False
+        if n == 0:
+            self._fire()
+
+    def check(self, arg):
+        if self.fired:
+            return
+        i, value = arg
+        self.values[i] = value
+        self.count += 1
+        if self.count == self.n:
+            self._fire()
+
+    def reply(self, i, value):
+        self.values[i] = value
+        self.count += 1
+        if self.count == self.n:
+            self.env.schedule(0, AllOf._last_reply, self)
+
+    @staticmethod
+    def _last_reply(cond):
+        cond._fire()
+
+    def _fire(self):
+        self.fired = True
+        self.env.schedule(0, AllOf._resume, self)
+
+    @staticmethod
+    def _resume(cond):
+        cond.resume(cond.values)
+
+    @classmethod
+    def of_events(cls, env, events, resume):
+        """AllOf over Event objects (some may already be processed)."""
+        cond = cls(env, len(events), resume)
+        if cond.fired:
+            return cond
+        for i, ev in enumerate(events):
+            if ev.callbacks is None:
+                cond.check((i, None))
+            else:
+                ev.callbacks.append((cond.check, (i, None)))
+        return cond
+
+
+############################################################
+# WORKER: only task execution differs from worker.Worker
+############################################################
+class FastWorker(Worker):
+
+    def _exec(self, jobid, tid, dur, sched, assigned_at, tenant=None):
+        return (self._exec_start, (jobid, tid, dur, sched, assigned_at, tenant))
+
+    def _exec_start(self, a):
+        jobid, tid, dur, sched, assigned_at, tenant = a
+        cls = self.task_class(jobid, sched)
+        self.active[(jobid, tid)] = (self.env.now, cls, self.estimate(cls))
+        self.env.schedule(ms(dur / self.speed), self._exec_end, (a, self.env.now, cls))
+
+    def _exec_end(self, arg):
+        (jobid, tid, dur, sched, assigned_at, tenant), start, cls = arg
+        end = self.env.now
+        self.active.pop((jobid, tid), None)
+        self.observe(cls, end - start)
+
+        self._release()
+        self.busy_time += (end - start)
+        self.work += dur
+        self.metrics.task(jobid, tid, dur, start, end, start - assigned_at, end - assigned_at,
+                          tenant)
+        self.env.schedule(ms(self.network.delay(self, sched)), self._exec_notify,
+                          (sched, jobid, tid))
+
+    def _exec_notify(self, arg):
+        sched, jobid, tid = arg
+        try:
+            sched.notify_done(jobid, tid)
+        except Exception:
+            pass
+
+    # work stealing: Worker._steal as continuations
+    def _steal(self):
+        return (self._steal_start, None)
+
+    def _steal_start(self, _):
+        peers = self._steal_peers()
+        self.steal_probes += len(peers)
+        cond = AllOf(self.env, len(peers), lambda qlens: self._steal_probed(peers, qlens))
+        for i, w in enumerate(peers):
+            self._peer_rpc(w, w.handle_steal_probe, lambda rep, i=i: cond.reply(i, rep))
+
+    def _steal_probed(self, peers, qlens):
+        victim = self._pick_victim(peers, qlens)
+        if victim is None:
+            self.stealing = False
+            return
+        self.steal_rpcs += 1
+        # the stealing process resumes on the RPC process' end event
+        self._peer_rpc(victim, victim.handle_steal,
+                       lambda entries: self.env.schedule(0, self._steal_done, entries))
+
+    def _steal_done(self, entries):
+        self._take(entries)
+        self.stealing = False
+
+    def _peer_rpc(self, w, handler, on_reply):
+        self.env.process((self._peer_send, (w, handler, on_reply)))
+
+    def _peer_send(self, a):
+        self.env.schedule(ms(self.network.delay(self, a[0])), self._peer_handle, a)
+
+    def _peer_handle(self, a):
+        w, handler, on_reply = a
+        rep = handler()
+        self.env.schedule(ms(self.network.delay(w, self, self._steal_bytes(rep))),
+                          self._peer_reply, (on_reply, rep))
+
+    def _peer_reply(self, a):
+        on_reply, rep = a
+        on_reply(rep)
+
+
+############################################################
+# SCHEDULER: batch / late / latepro as continuations
+############################################################
+class FastScheduler(BaseScheduler):
+    """BaseScheduler (same setup, counters, bookkeeping, policy and
+    results()) with the SimPy processes replaced by continuations."""
+
+    def start(self):
+        self.env.process((self._run, 0))
+
+    # ---------------------------------------------------------
+    # RPCs: start -> (+delay) handler -> (+delay) reply -> cond check
+    # ---------------------------------------------------------
+    def _fan_out(self, cond, calls, size=0):
+        """Start an RPC per (w, handler, args) in `calls`, reply i to cond[i].
+
+        RPCs are only started from scheduler continuations, which schedule
+        nothing else afterwards, so the process start (URGENT) can push the
+        first timeout right away without changing the event order.
+
+        On the fixed network every leg takes the same time: the handlers
+        are consecutive heap events and the replies arrive in the order
+        they were sent, so one event runs all the handlers (process starts
+        in between, as run() would) and only the last reply, the one that
+        can fire `cond`, goes on the heap."""
+        if not calls:
+            return
+        net = self.network
+        if type(net) is netmodel.Network:
+            self.env.schedule(net.delay(self, calls[0][0], size), self._handle_all,
+                              (cond, calls))
+            return
+        for i, (w, handler, args) in enumerate(calls):
+            self.env.schedule(net.delay(self, w, size), self._rpc_handle,
+                              (cond, i, w, handler, args))
+
+    def _handle_all(self, a):
+        cond, calls = a
+        env, last = self.env, len(calls) - 1
+        for i, (w, handler, args) in enumerate(calls):
+            rep = handler(*args)
+            if i < last:
+                cond.reply(i, rep)
+                env.drain()
+            else:
+                env.schedule(self.network.delay(w, self), self._rpc_reply, (cond, i, rep))
+
+    def _rpc_handle(self, a):
+        cond, i, w, handler, args = a
+        rep = handler(*args)
+        self.env.schedule(self.network.delay(w, self), self._rpc_reply, (cond, i, rep))
+
+    def _rpc_reply(self, a):
+        cond, i, rep = a
+        cond.reply(i, rep)
+
+    def _requests(self, cond, ws, jobid):
+        self.rpc_total += len(ws); self.rpc_request_count += len(ws)
+        self.res_created += len(ws)
+        tenant = self.jobinfo[jobid]["tenant"]
+        self._fan_out(cond, [(w, w.handle_request, (jobid, f"T{i}", self, tenant))
+                             for i, w in enumerate(ws)])
+
+    def _probes(self, cond, ws):
+        self.rpc_total += len(ws); self.rpc_probe_count += len(ws)
+        self._fan_out(cond, [(w, w.handle_probe, ()) for w in ws])
+
+    def _assigns(self, cond, ws, jobid, first_tid, durs):
+        self.rpc_total += len(ws); self.rpc_assign_count += len(ws)
+        tenant = self.jobinfo[jobid]["tenant"]
+        self._fan_out(cond, [(w, w.handle_assign,
+                              (jobid, f"T{first_tid + t}", self,
+                               task_dur(durs, first_tid + t), tenant))
+                             for t, w in enumerate(ws)], self.network.task_bytes)
+
+    def _assign_rids(self, cond, chosen, durs):
+        self.rpc_total += len(chosen); self.rpc_assign_rid_count += len(chosen)
+        self.res_used += len(chosen)
+        self._fan_out(cond, [(w, w.handle_assign_rid, (rid, task_dur(durs, i)))
+                             for i, (rid, w) in enumerate(chosen)], self.network.task_bytes)
+
+    def _cancels(self, cond, unused):
+        self.rpc_total += len(unused); self.rpc_cancel_count += len(unused)
+        self.res_wasted += len(unused)
+        self._fan_out(cond, [(w, w.handle_cancel, (rid,)) for rid, w in unused])
+
+    # ---------------------------------------------------------
+    # Job lifecycle, like the SimPy run() / run_job() processes
+    # ---------------------------------------------------------
+    def _run(self, j):
+        if j >= self.jobs:
+            return
+        self.env.process((self._start_job, (j, None)))
+        if self.arrivals is not None:
+            self.env.schedule(ms(self.arrivals()), self._run, j + 1)
+
+    def submit(self, j, durations):
+        self.env.process((self._start_job, (j, durations)))
+
+    def _start_job(self, arg):
+        j, durs = arg
+        env = self.env
+        jobid = f"{self.name}-J{j}"
+        self.jobinfo[jobid] = {"start": env.now}
+
+        tenant, m_job = self.job_size(durs)
+        self.jobinfo[jobid]["tasks"] = m_job
+        self.jobinfo[jobid]["tenant"] = tenant
+        if durs is None:
+            durs = self.workload.durations(m_job)
+
+        evs = []
+        for t in range(m_job):
+            e = Event(env)
+            self.wait_events[(jobid, f"T{t}")] = e
+            evs.append(e)
+
+        sampled = self.sample_workers(m_job)
+        job = (j, jobid, m_job, evs, sampled, durs)
+
+        if self.mode == "batch":
+            cond = AllOf(env, len(sampled), lambda reps: self._placed_probes(job, reps))
+            self._probes(cond, sampled)
+        else:
+            cond = AllOf(env, len(sampled), lambda reps: self._reserved(job, reps))
+            self._requests(cond, sampled, jobid)
+
+    def _placed_probes(self, job, reps, first_tid=0, need=None):
+        """Rank probe replies and assign `need` tasks as the policy says."""
+        j, jobid, m_job, evs, sampled, durs = job
+        if need is None:
+            need = m_job
+        chosen_workers = self.policy.place(reps, sampled, need)
+        cond = AllOf(self.env, len(chosen_workers), lambda _: self._wait_tasks(job))
+        self._assigns(cond, chosen_workers, jobid, first_tid, durs)
+
+    def _reserved(self, job, reps):
+        j, jobid, m_job, evs, sampled, durs = job
+        reservations = []
+        for i, rep in enumerate(reps):
+            if isinstance(rep, str) and rep.startswith("RID"):
+                reservations.append((rep.split()[1], sampled[i]))
+
+        chosen = reservations[:m_job]
+        self.res_used += len(chosen)
+        self.policy.used([w for _, w in chosen])
+        after = lambda _: self._bound(job, reservations, chosen)
+        if chosen:
+            cond = AllOf(self.env, len(chosen), after)
+            self._assign_rids(cond, chosen, durs)
+        else:
+            after(None)
+
+    def _bound(self, job, reservations, chosen):
+        j, jobid, m_job, evs, sampled, durs = job
+        unused = reservations[m_job:]
+        after = lambda _: self._fallback(job, chosen)
+        if self.mode == "latepro" and unused:
+            cond = AllOf(self.env, len(unused), after)
+            self._cancels(cond, unused)
+        else:
+            after(None)
+
+    def _fallback(self, job, chosen):
+        """Too few reservations: probe again and assign the rest directly."""
+        j, jobid, m_job, evs, sampled, durs = job
+        if len(chosen) >= m_job:
+            self._wait_tasks(job)
+            return
+        need = m_job - len(chosen)
+        sampled2 = self.sample_workers(m_job)
+        job2 = (j, jobid, m_job, evs, sampled2, durs)
+        cond = AllOf(self.env, len(sampled2),
+                     lambda reps: self._placed_probes(job2, reps, len(chosen), need))
+        self._probes(cond, sampled2)
+
+    def _wait_tasks(self, job):
+        j, jobid, m_job, evs, sampled, durs = job
+        AllOf.of_events(self.env, evs, lambda _: self._job_done(job))
+
+    def _job_done(self, job):
+        j, jobid = job[0], job[1]
+        self.job_done(jobid)
+        if self.arrivals is None:
+            # run_job's end event resumes the closed loop
+            self.env.schedule(0, self._run, j + 1)
+
+
+class TraceFeeder:
+    """Same as simulation.trace_feeder: hand trace jobs to the schedulers
+    round-robin at their arrival times."""
+
+    def __init__(self, env, scheds, records):
+        self.env = env
+        self.scheds = scheds
+        self.records = enumerate(records)
+        self.pending = None
+        env.process((self._feed, None))
+
+    def _feed(self, _):
+        env, n = self.env, len(self.scheds)
+        while True:
+            if self.pending is None:
+                self.pending = next(self.records, None)
+                if self.pending is None:
+                    return
+                k, (arrival, durs) = self.pending
+                if arrival > env.now:
+                    env.schedule(arrival - env.now, self._feed)
+                    return
+            k, (arrival, durs) = self.pending
+            self.pending = None
+            self.scheds[k % n].submit(k // n, durs)
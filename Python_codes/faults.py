@@ -0,0 +1,204 @@
+# faults.py
+"""
+Fault injection and scheduler-side recovery for the simulator.
+
+Faults (one per run, set up by run_sim) breaks the cluster:
+
+    crash      every worker crashes after an exponential time with mean
+               `mtbf` ms and comes back empty after one with mean `mttr`;
+               its running, queued and reserved tasks are lost
+    loss       every scheduler <-> worker message (RPC request, reply,
+               DONE) is dropped with probability `loss`
+    partition  every `partition_every` ms on average, a random fraction
+               `partition_frac` of the workers is cut off from the
+               schedulers for `partition_ms`; their tasks keep running but
+               nothing gets through either way
+
+Recovery (one per scheduler, sch.recovery) keeps jobs from hanging:
+
+- an RPC without a reply within `rpc_timeout` ms (lost, or late on a slow
+  netmodel.py link) returns None then, and the worker is blacklisted (not
+  probed; samples are topped up with other workers) for `blacklist_ms`;
+- every placed task has a watchdog: after `task_timeout` ms without a DONE
+  the scheduler asks the worker for the task's status. Still queued or
+  running: wait another round. Unknown, or no answer: place it again with
+  a fresh probe, like a new one-task job. The first copy to report wins.
+
+Faults use their own stream (streams.py), so the workload stays the same
+as without them. Only the simpy engine models faults.
+"""
+import simpy
+
+import streams
+
+def ms(x):
+    return float(x)
+
+
+class Faults:
+
+    def __init__(self, env, workers, mtbf=0.0, mttr=1000.0, loss=0.0,
+                 partition_every=0.0, partition_ms=500.0, partition_frac=0.2,
+                 seed=0, jobs=None):
+        self.env = env
+        self.workers = workers
+        self.mtbf = mtbf
+        self.mttr = mttr
+        self.loss = loss
+        self.partition_ms = partition_ms
+        self.partition_frac = partition_frac
+        self.rng = streams.Stream(seed, streams.FAULTS)
+
+        self.cut = set()         # ids of the workers partitioned away
+        # `finished` fires when the last of `jobs` is done; faults stop then
+        self.jobs_left = jobs
+        self.finished = simpy.Event(env)
+
+        # report
+        self.crashes = 0
+        self.lost_tasks = 0      # running or queued tasks a crash took down
+        self.lost_msgs = 0
+        self.partitions = 0
+
+        if mtbf > 0:
+            for w in workers:
+                env.process(self._churn(w))
+        if partition_every > 0:
+            env.process(self._partitions(partition_every))
+
+    def deliver(self, w):
+        """Does one message between a scheduler and worker `w` get through?"""
+        if not w.up or w.id in self.cut:
+            return False
+        if self.loss and self.rng.random() < self.loss:
+            self.lost_msgs += 1
+            return False
+        return True
+
+    def job_finished(self):
+        if self.jobs_left is None:
+            return
+        self.jobs_left -= 1
+        if self.jobs_left == 0:
+            self.finished.succeed()
+
+    def _churn(self, w):
+        while True:
+            yield self.env.timeout(ms(self.rng.expovariate(1.0 / self.mtbf)))
+            if self.finished.triggered:
+                return
+            self.crashes += 1
+            self.lost_tasks += w.crash()
+            yield self.env.timeout(ms(self.rng.expovariate(1.0 / self.mttr)))
+            w.restart()
+
+    def _partitions(self, every):
+        k = max(1, round(self.partition_frac * len(self.workers)))
+        while True:
+            yield self.env.timeout(ms(self.rng.expovariate(1.0 / every)))
+            if self.finished.triggered:
+                return
+            self.partitions += 1
+            self.cut = {w.id for w in self.rng.sample(self.workers, k)}
+            yield self.env.timeout(ms(self.partition_ms))
+            self.cut = set()
+
+    def results(self):
+        return {"crashes": self.crashes, "lost_tasks": self.lost_tasks,
+                "lost_msgs": self.lost_msgs, "partitions": self.partitions}
+
+
+class Recovery:
+
+    def __init__(self, sched, faults, task_timeout=500.0, rpc_timeout=20.0,
+                 blacklist_ms=2000.0):
+        rtt = sched.network.round_trip()
+        if rpc_timeout <= rtt:
+            raise ValueError(f"rpc_timeout ({rpc_timeout:g} ms) must exceed the network's "
+                             f"round trip ({rtt:g} ms)")
+        self.sched = sched
+        self.env = sched.env
+        self.faults = faults
+        self.task_timeout = task_timeout
+        self.rpc_timeout = rpc_timeout
+        self.blacklist_ms = blacklist_ms
+
+        self.tasks = {}          # (jobid, tid) -> (worker, dur), placed and not done
+        self.blacklist = {}      # worker id -> blacklisted until
+
+        # report
+        self.timeouts = 0        # RPCs without a reply
+        self.replaced = 0        # tasks placed again
+        self.blacklisted = 0
+
+    # ---------------------------------------------------------
+    # Scheduler hooks
+    # ---------------------------------------------------------
+    def track(self, jobid, tid, w, dur, ok=True):
+        """Task `tid` was sent to `w`; ok=False if the assign got no "OK"."""
+        ev = self.sched.wait_events.get((jobid, tid))
+        if ev is None or ev.triggered:
+            return
+        self.tasks[(jobid, tid)] = (w, dur)
+        self.env.process(self._watch((jobid, tid), w, ok))
+
+    def done(self, jobid, tid):
+        self.tasks.pop((jobid, tid), None)
+
+    def forget(self, jobid):
+        self.faults.job_finished()
+
+    def silent(self, w):
+        """`w` did not answer an RPC."""
+        self.timeouts += 1
+        if self.blacklist.get(w.id, -1.0) < self.env.now:
+            self.blacklisted += 1
+        self.blacklist[w.id] = self.env.now + self.blacklist_ms
+
+    def usable(self, workers, n=None):
+        """`workers` minus the blacklisted ones, topped up to `n` with other
+        workers that are not blacklisted (so a job keeps its d*m choices);
+        all of `workers` if none is left."""
+        now = self.env.now
+        ok = [w for w in workers if self.blacklist.get(w.id, -1.0) < now]
+        if n is not None and len(ok) < n:
+            taken = {w.id for w in workers}
+            spare = [w for w in self.sched.workers
+                     if w.id not in taken and self.blacklist.get(w.id, -1.0) < now]
+            ok += self.sched.rng.sample(spare, min(n - len(ok), len(spare)))
+        return ok or workers
+
+    def answered(self, workers, reps):
+        """Keep the workers that replied; blacklist the others."""
+        keep = []
+        for w, rep in zip(workers, reps):
+            if rep is None:
+                self.silent(w)
+            else:
+                keep.append((w, rep))
+        return [w for w, _ in keep], [rep for _, rep in keep]
+
+    # ---------------------------------------------------------
+    # Watchdog
+    # ---------------------------------------------------------
+    def _watch(self, key, w, ok):
+        while ok:
+            yield self.env.timeout(ms(self.task_timeout))
+            rec = self.tasks.get(key)
+            if rec is None or rec[0] is not w:
+                return           # done, or placed again meanwhile
+            rep = yield self.env.process(self.sched.rpc_status(w, *key))
+            if rep is None:
+                self.silent(w)
+            ok = rep in ("RUNNING", "QUEUED")
+        rec = self.tasks.get(key)
+        if rec is None or rec[0] is not w:
+            return
+        self.replaced += 1
+        jobid, tid = key
+        t = int(tid[1:])
+        yield from self.sched.probe_place(jobid, 1, {t: rec[1]}, first_tid=t, need=1)
+
+    def results(self):
+        return {"timeouts": self.timeouts, "replaced": self.replaced,
+                "blacklisted": self.blacklisted}
@@ -0,0 +1,219 @@
+# metrics.py
+"""
+Constant-memory metric collection for the simulator.
+
+- Moments:      running count / mean / variance / min / max (Welford)
+- LogHistogram: HDR-style histogram with log-spaced buckets, so every
+                quantile is within `precision` relative error; mergeable
+                across schedulers, workers and seeds
+- TaskSink:     what workers report finished tasks and schedulers report
+                finished jobs to; keeps tail histograms per job class and
+                optionally spills every task record to a CSV file
+- JobStats:     what a scheduler records its own finished jobs into
+
+Job classes: "short" / "heavy" (a job is heavy if any of its tasks ran
+longer than heavy_ms) and task-count buckets "tasks 1", "tasks 2-4", ...
+Task waits are split short / heavy by the task's own duration. With
+tenants (tenants.py) both also get one "tenant <name>" class per tenant.
+
+None of these keep per-task or per-job objects in memory.
+"""
+import math
+
+QUANTILES = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p999", 0.999)]
+SIZE_BUCKETS = [(1, "1"), (4, "2-4"), (16, "5-16"), (64, "17-64"), (math.inf, "65+")]
+
+
+CLASSES = ["all", "short", "heavy"] + ["tasks " + label for _, label in SIZE_BUCKETS]
+
+
+def size_class(tasks):
+    for hi, label in SIZE_BUCKETS:
+        if tasks <= hi:
+            return "tasks " + label
+
+
+class Moments:
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        d = other.mean - self.mean
+        self.mean += d * other.n / n
+        self.m2 += other.m2 + d * d * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class LogHistogram:
+    """Bucket i holds values in (g^(i-1), g^i] with g = 1 + precision;
+    values <= 0 go to a separate zero bucket."""
+
+    def __init__(self, precision=0.01):
+        self.precision = precision
+        self.log_g = math.log1p(precision)
+        self.counts = {}         # bucket index -> count
+        self.zeros = 0
+        self.n = 0
+
+    def add(self, x):
+        self.n += 1
+        if x <= 0:
+            self.zeros += 1
+            return
+        i = math.ceil(math.log(x) / self.log_g)
+        self.counts[i] = self.counts.get(i, 0) + 1
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge histograms of different precision")
+        self.n += other.n
+        self.zeros += other.zeros
+        for i, c in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + c
+
+    def quantile(self, q):
+        """Nearest-rank quantile, q in [0, 1]; 0.0 when empty."""
+        if self.n == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.n))
+        seen = self.zeros
+        if seen >= rank:
+            return 0.0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                # middle of the bucket, relative error <= precision / 2
+                hi = math.exp(i * self.log_g)
+                return hi * 2 / (2 + self.precision)
+
+    def to_dict(self):
+        return {"precision": self.precision, "zeros": self.zeros,
+                "counts": {str(i): c for i, c in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        h = cls(d["precision"])
+        h.zeros = d["zeros"]
+        h.counts = {int(i): c for i, c in d["counts"].items()}
+        h.n = h.zeros + sum(h.counts.values())
+        return h
+
+
+def tails(hist):
+    """{"n":, "p50":, "p90":, "p99":, "p999":} of one histogram."""
+    out = {"n": hist.n}
+    for name, q in QUANTILES:
+        out[name] = hist.quantile(q)
+    return out
+
+
+class TaskSink:
+    """Receives one call per finished task (Worker._exec) and per finished
+    job (scheduler job_done)."""
+
+    FIELDS = ("jobid", "tid", "duration", "start", "end", "wait", "response")
+
+    def __init__(self, spill=None, heavy_ms=math.inf):
+        self.heavy_ms = heavy_ms
+        self.wait = Moments()
+        self.response = Moments()
+        self.service = Moments()
+        self.wait_hist = {"all": LogHistogram()}          # class -> histogram
+        self.completion_hist = {"all": LogHistogram()}
+        self.heavy_jobs = set()                           # in-flight jobs with a heavy task
+        self.spill = None
+        if spill:
+            self.spill = open(spill, "w")
+            self.spill.write(",".join(self.FIELDS) + "\n")
+
+    def task(self, jobid, tid, duration, start, end, wait, response, tenant=None):
+        self.wait.add(wait)
+        self.response.add(response)
+        self.service.add(duration)
+        heavy = duration > self.heavy_ms
+        if heavy:
+            self.heavy_jobs.add(jobid)
+        self._hist(self.wait_hist, "all").add(wait)
+        self._hist(self.wait_hist, "heavy" if heavy else "short").add(wait)
+        if tenant is not None:
+            self._hist(self.wait_hist, "tenant " + tenant.name).add(wait)
+        if self.spill:
+            self.spill.write(f"{jobid},{tid},{duration},{start},{end},{wait},{response}\n")
+
+    def job(self, jobid, tasks, completion, tenant=None):
+        if jobid in self.heavy_jobs:
+            self.heavy_jobs.discard(jobid)
+            cls = "heavy"
+        else:
+            cls = "short"
+        for key in ("all", cls, size_class(tasks)):
+            self._hist(self.completion_hist, key).add(completion)
+        if tenant is not None:
+            self._hist(self.completion_hist, "tenant " + tenant.name).add(completion)
+
+    @staticmethod
+    def _hist(hists, key):
+        h = hists.get(key)
+        if h is None:
+            h = hists[key] = LogHistogram()
+        return h
+
+    def tails(self):
+        """Per-class percentiles: {"completion": {class: tails}, "task_wait": {...}}."""
+        return {"completion": {k: tails(h) for k, h in self._ordered(self.completion_hist)},
+                "task_wait": {k: tails(h) for k, h in self._ordered(self.wait_hist)}}
+
+    def hists(self):
+        """Serialisable histograms, to merge across schedulers / seeds."""
+        return {"completion": {k: h.to_dict() for k, h in self._ordered(self.completion_hist)},
+                "task_wait": {k: h.to_dict() for k, h in self._ordered(self.wait_hist)}}
+
+    @staticmethod
+    def _ordered(hists):
+        # fixed classes first, then the tenants
+        rest = sorted(k for k in hists if k not in CLASSES)
+        return [(k, hists[k]) for k in CLASSES if k in hists] + [(k, hists[k]) for k in rest]
+
+    def close(self):
+        if self.spill:
+            self.spill.close()
+            self.spill = None
+
+
+class JobStats:
+    """Completion time and size of finished jobs (per scheduler)."""
+
+    def __init__(self):
+        self.completion = Moments()
+        self.completion_hist = LogHistogram()
+        self.tasks = Moments()
+
+    def add(self, start, done, tasks):
+        self.completion.add(done - start)
+        self.completion_hist.add(done - start)
+        self.tasks.add(tasks)
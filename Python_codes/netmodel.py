@@ -0,0 +1,231 @@
+# netmodel.py
+"""
+One-way message delays between simulated schedulers and workers.
+
+Every RPC leg, DONE and steal message asks the run's network for
+delay(src, dst, payload) in ms: a latency from the model plus, with a
+`bandwidth`, the serialization time of the message (MSG_BYTES of header
+plus `payload` bytes; task-carrying messages add `task_kb` per task).
+make_network(kind, ndelay, seed, params) builds one; kind is
+
+    fixed      every message takes ndelay ms (the original)
+    lognormal  heavy-tailed: lognormal with mean ndelay and shape `sigma`
+    rack       synthetic topology: RACK_SIZE hosts per rack, `racks_per_zone`
+               racks per zone, one worker per host
+
+or a file, either a host list (one "ip [rack [zone]]" per line, like
+IPs.txt; rack defaults to the /24 and zone to the /16 of the ip) or an
+empirical latency histogram (one "ms,count" per line, e.g. halved RPC
+round trips measured on the real cluster).
+
+A topology puts every worker and scheduler on a host and makes the delay
+depend on how far apart they are:
+
+    same host   host_ms
+    same rack   ndelay
+    same zone   rack_ms             (default 3 x ndelay)
+    otherwise   zone_ms             (default 10 x ndelay)
+
+optionally times a lognormal jitter with mean 1 and shape `jitter`. Links
+leaving a rack get bandwidth / oversub. With a topology, policies.rack_of
+uses the network's racks instead of RACK_SIZE blocks of worker ids.
+
+Random models draw from their own stream (streams.py), so the workload
+stays the same as with a fixed delay; the fast engine asks for delays in the same
+order as SimPy and gets the same draws.
+"""
+import csv
+import math
+
+import streams
+
+KINDS = ["fixed", "lognormal", "rack"]
+
+MSG_BYTES = 128          # header of every message (command, ids, reply)
+RACK_SIZE = 10           # hosts per rack of the synthetic topology
+
+
+class Network:
+    """The fixed model; subclasses override latency() (and bytes_per_ms())."""
+
+    def __init__(self, ndelay, bandwidth=0.0, task_kb=0.0):
+        self.nd = ndelay
+        self.bandwidth = bandwidth           # Gbit/s per link, 0 = unlimited
+        self.task_bytes = task_kb * 1024
+
+    def latency(self, a, b):
+        return self.nd
+
+    def bytes_per_ms(self, a, b):
+        return self.bandwidth * 125000.0
+
+    def delay(self, a, b, payload=0):
+        d = self.latency(a, b)
+        if self.bandwidth:
+            d += (MSG_BYTES + payload) / self.bytes_per_ms(a, b)
+        return d
+
+    def place(self, workers, scheds):
+        """Put the endpoints on hosts (topologies only)."""
+
+    def slowest(self):
+        """One-way latency of the slowest path (the mean for random models)."""
+        return self.nd
+
+    def round_trip(self):
+        return 2 * self.slowest()
+
+
+class LogNormal(Network):
+
+    def __init__(self, ndelay, sigma=1.0, seed=0, **kw):
+        super().__init__(ndelay, **kw)
+        self.sigma = sigma
+        self.mu = math.log(ndelay) - sigma * sigma / 2
+        self.rng = streams.Stream(seed, streams.NETWORK)
+
+    def latency(self, a, b):
+        return self.rng.lognormvariate(self.mu, self.sigma)
+
+
+class Empirical(Network):
+
+    def __init__(self, ndelay, hist, seed=0, **kw):
+        super().__init__(ndelay, **kw)
+        self.values = [v for v, _ in hist]
+        self.cum = []
+        total = 0.0
+        for _, c in hist:
+            total += c
+            self.cum.append(total)
+        self.rng = streams.Stream(seed, streams.NETWORK)
+
+    def latency(self, a, b):
+        return self.rng.choices(self.values, cum_weights=self.cum)[0]
+
+    def slowest(self):
+        prev, mean = 0.0, 0.0
+        for v, c in zip(self.values, self.cum):
+            mean += v * (c - prev)
+            prev = c
+        return mean / self.cum[-1]
+
+
+class Topology(Network):
+
+    def __init__(self, ndelay, hosts, seed=0, host_ms=0.05, rack_ms=None, zone_ms=None,
+                 jitter=0.0, oversub=1.0, **kw):
+        super().__init__(ndelay, **kw)
+        self.hosts = hosts                   # [(rack, zone)] per host
+        self.host_ms = host_ms
+        self.rack_ms = 3 * ndelay if rack_ms is None else rack_ms
+        self.zone_ms = 10 * ndelay if zone_ms is None else zone_ms
+        self.jitter = jitter
+        self.oversub = oversub
+        self.rng = streams.Stream(seed, streams.NETWORK)
+
+    def place(self, workers, scheds):
+        # workers fill the hosts in order (several per host once they run
+        # out); schedulers are spread evenly over the same hosts
+        n = len(self.hosts)
+        for w in workers:
+            w.host = w.id % n
+            w.rack = self.hosts[w.host]
+        for i, s in enumerate(scheds):
+            s.host = (i * n // len(scheds)) % n
+
+    def latency(self, a, b):
+        ha, hb = a.host, b.host
+        if ha == hb:
+            d = self.host_ms
+        else:
+            (ra, za), (rb, zb) = self.hosts[ha], self.hosts[hb]
+            if ra == rb and za == zb:
+                d = self.nd
+            elif za == zb:
+                d = self.rack_ms
+            else:
+                d = self.zone_ms
+        if self.jitter:
+            d *= self.rng.lognormvariate(-self.jitter * self.jitter / 2, self.jitter)
+        return d
+
+    def slowest(self):
+        # without jitter; schedulers and workers share hosts, so this is a bound
+        if len({z for _, z in self.hosts}) > 1:
+            return self.zone_ms
+        if len(set(self.hosts)) > 1:
+            return self.rack_ms
+        return max(self.nd, self.host_ms) if len(self.hosts) > 1 else self.host_ms
+
+    def bytes_per_ms(self, a, b):
+        bw = self.bandwidth * 125000.0
+        return bw if self.hosts[a.host] == self.hosts[b.host] else bw / self.oversub
+
+
+def is_ip(s):
+    parts = s.split(".")
+    return len(parts) == 4 and all(p.isdigit() for p in parts)
+
+
+def load_hosts(path):
+    """[(rack, zone)] per host of a host list."""
+    hosts = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            ip = fields[0]
+            rack = fields[1] if len(fields) > 1 else ip.rsplit(".", 1)[0]
+            zone = fields[2] if len(fields) > 2 else ip.rsplit(".", 2)[0]
+            hosts.append((rack, zone))
+    if not hosts:
+        raise ValueError(f"{path}: no hosts")
+    return hosts
+
+
+def load_histogram(path):
+    """[(ms, count)] of a latency histogram file."""
+    hist = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith("#") or row[0].strip() == "ms":
+                continue
+            value = float(row[0])
+            count = float(row[1]) if len(row) > 1 and row[1].strip() else 1.0
+            if value < 0 or count < 0:
+                raise ValueError(f"{path}: bad bin {row}")
+            hist.append((value, count))
+    if not hist or sum(c for _, c in hist) == 0:
+        raise ValueError(f"{path}: empty histogram")
+    return hist
+
+
+def is_host_list(path):
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith("#"):
+                return is_ip(fields[0])
+    return False
+
+
+def make_network(kind, ndelay, seed=0, params=None, workers=0):
+    """Network for a model name or file; `workers` sizes the rack topology."""
+    params = dict(params or {})
+    link = {k: params.pop(k) for k in ("bandwidth", "task_kb") if k in params}
+    if kind is None or kind == "fixed":
+        return Network(ndelay, **link)
+    if kind == "lognormal":
+        return LogNormal(ndelay, params.get("sigma", 1.0), seed, **link)
+
+    topo = {k: params[k] for k in ("host_ms", "rack_ms", "zone_ms", "jitter", "oversub")
+            if k in params}
+    if kind == "rack":
+        per_zone = params.get("racks_per_zone", 4)
+        hosts = [(i // RACK_SIZE, i // (RACK_SIZE * per_zone)) for i in range(max(1, workers))]
+        return Topology(ndelay, hosts, seed, **topo, **link)
+    if is_host_list(kind):
+        return Topology(ndelay, load_hosts(kind), seed, **topo, **link)
+    return Empirical(ndelay, load_histogram(kind), seed, **link)
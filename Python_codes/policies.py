@@ -0,0 +1,174 @@
+# policies.py
+"""
+Placement policies for the simulated schedulers.
+
+A policy is three parts, each picked by name from a registry:
+
+    sampling   which workers a job probes (or reserves on)
+                 uniform    d*m distinct workers at random (the original)
+                 locality   as many as possible from the job's home rack
+                 sticky     half from the workers this scheduler used last
+    ranking    how probe replies are ordered, best first
+                 count      queued tasks per unit of worker capacity
+                 wait       estimated wait in ms (worker.expected_wait)
+    placement  which probed worker gets each task
+                 batch      the m best of all d*m, reused cyclically
+                 per_task   task t takes the best of its own d probes
+                            (power of d choices per task)
+
+POLICIES names the combinations the CLI offers; make_policy() builds any
+other. Schedulers only call sample() and place(), so a new strategy is one
+function plus a registry entry:
+
+    python3 simulation.py --policy per_task --slots 1
+    python3 sweep.py --grid policy=batch,per_task,sticky --set slots=1
+"""
+
+from worker import parse_probe
+
+# workers per rack, unless the network (netmodel.py) has a topology
+RACK_SIZE = 10
+# workers a sticky scheduler remembers
+STICKY_MEMORY = 16
+
+
+def rack_of(w):
+    return w.id // RACK_SIZE if w.rack is None else w.rack
+
+
+# ---------------------------------------------------------
+# Sampling: (policy, sched, n) -> n workers
+# ---------------------------------------------------------
+def sample_uniform(policy, sched, n):
+    return sched.rng.sample(sched.workers, n)
+
+
+def sample_locality(policy, sched, n):
+    # the job's input lives on one rack; probe there first
+    racks = sorted({rack_of(w) for w in sched.workers})
+    home = sched.rng.choice(racks)
+    local = [w for w in sched.workers if rack_of(w) == home]
+    chosen = sched.rng.sample(local, min(len(local), n))
+    if len(chosen) < n:
+        others = [w for w in sched.workers if rack_of(w) != home]
+        chosen += sched.rng.sample(others, n - len(chosen))
+    return chosen
+
+
+def sample_sticky(policy, sched, n):
+    # reuse the most recently used workers (warm caches), fill up at random
+    chosen = policy.recent[:n // 2]
+    if len(chosen) < n:
+        taken = {w.id for w in chosen}
+        others = [w for w in sched.workers if w.id not in taken]
+        chosen = chosen + sched.rng.sample(others, n - len(chosen))
+    return chosen
+
+
+SAMPLING = {
+    "uniform": sample_uniform,
+    "locality": sample_locality,
+    "sticky": sample_sticky,
+}
+
+
+# ---------------------------------------------------------
+# Ranking: probe reply -> sort key (lower is better)
+# ---------------------------------------------------------
+def rank_count(rep):
+    return parse_probe(rep)[2]
+
+
+def rank_wait(rep):
+    q, wait, load = parse_probe(rep)
+    return (wait, load)
+
+
+RANKING = {
+    "count": rank_count,
+    "wait": rank_wait,
+}
+
+
+# ---------------------------------------------------------
+# Placement: ([(key, worker)] in probe order, need) -> one worker per task
+# ---------------------------------------------------------
+def place_batch(qlist, need):
+    qlist.sort(key=lambda x: x[0])
+    return [qlist[i % len(qlist)][1] for i in range(need)]
+
+
+def place_per_task(qlist, need):
+    # task t takes the best of probe group t; with fewer groups than tasks
+    # (the sample was capped at the cluster size) the groups are reused
+    # cyclically, so no worker gets more than its share
+    g = max(1, len(qlist) // need)
+    groups = max(1, len(qlist) // g)
+    out = []
+    for t in range(need):
+        k = t % groups
+        group = qlist[k * g:(k + 1) * g] or qlist
+        out.append(min(group, key=lambda x: x[0])[1])
+    return out
+
+
+PLACEMENT = {
+    "batch": place_batch,
+    "per_task": place_per_task,
+}
+
+
+class Policy:
+    """One scheduler's sampling + ranking + placement (holds sticky state)."""
+
+    def __init__(self, sampling="uniform", ranking="count", placement="batch"):
+        for kind, name, reg in (("sampling", sampling, SAMPLING),
+                                ("ranking", ranking, RANKING),
+                                ("placement", placement, PLACEMENT)):
+            if name not in reg:
+                raise ValueError(f"unknown {kind}: {name}")
+        self.sampling = sampling
+        self.ranking = ranking
+        self.placement = placement
+        self.recent = []         # sticky: workers used, most recent first
+
+    def sample(self, sched, n):
+        return SAMPLING[self.sampling](self, sched, n)
+
+    def key(self, rep):
+        return RANKING[self.ranking](rep)
+
+    def place(self, reps, sampled, need):
+        """Rank probe replies and pick one worker per task."""
+        qlist = [(self.key(rep), sampled[i]) for i, rep in enumerate(reps)]
+        chosen = PLACEMENT[self.placement](qlist, need)
+        self.used(chosen)
+        return chosen
+
+    def used(self, workers):
+        """Tasks went to `workers` (sticky sampling remembers them)."""
+        if self.sampling != "sticky":
+            return
+        seen = set()
+        recent = []
+        for w in list(workers) + self.recent:
+            if w.id not in seen:
+                seen.add(w.id)
+                recent.append(w)
+        self.recent = recent[:STICKY_MEMORY]
+
+
+# named (sampling, placement) combinations; ranking is chosen separately
+POLICIES = {
+    "batch": ("uniform", "batch"),
+    "per_task": ("uniform", "per_task"),
+    "locality": ("locality", "batch"),
+    "sticky": ("sticky", "batch"),
+}
+
+
+def make_policy(name="batch", ranking="count"):
+    if name not in POLICIES:
+        raise ValueError(f"unknown policy: {name}")
+    sampling, placement = POLICIES[name]
+    return Policy(sampling, ranking, placement)
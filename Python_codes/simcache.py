@@ -0,0 +1,94 @@
+"""
+On-disk result cache for run_sim() points.
+
+One JSON file per run, named by sha256 of the parameters, the seed and a
+version stamp of the simulator sources, so editing the simulator invalidates
+old entries by itself. A "trace" parameter is keyed by the file's contents,
+not its path. Files are written to a temp name and renamed into place: an
+interrupted sweep leaves either a complete entry or none.
+
+    .simcache/ab/ab12...ef.json  ->  {"params": ..., "seed": ..., "version": ..., "out": ...}
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(HERE, ".simcache")
+
+# driver scripts that cannot change a run's result
+NOT_SIMULATOR = {"sweep.py", "simcache.py"}
+
+_version = None
+_digests = {}
+
+
+def code_version():
+    """sha256 over the simulator sources in this directory (computed once)."""
+    global _version
+    if _version is None:
+        h = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(HERE, "*.py"))):
+            name = os.path.basename(path)
+            if name in NOT_SIMULATOR:
+                continue
+            h.update(name.encode())
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _version = h.hexdigest()[:16]
+    return _version
+
+
+def file_digest(path):
+    """sha256 of a (possibly large) input file, once per process."""
+    if path not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[path] = h.hexdigest()
+    return _digests[path]
+
+
+class ResultCache:
+
+    def __init__(self, root=DEFAULT_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, params, seed):
+        if params.get("trace"):
+            params = dict(params, trace=file_digest(params["trace"]))
+        blob = json.dumps({"params": params, "seed": seed, "version": code_version()},
+                          sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, params, seed):
+        """Cached run_sim() output, or None."""
+        try:
+            with open(self.path(self.key(params, seed))) as f:
+                out = json.load(f)["out"]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return out
+
+    def put(self, params, seed, out):
+        path = self.path(self.key(params, seed))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"params": params, "seed": seed,
+                           "version": code_version(), "out": out}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -3,42 +3,60 @@ import simpy
 import random
 import statistics
 
-from worker import Worker
+from worker import Worker, MEAN_DURATION, DURATIONS, DURATION_WEIGHTS
+from metrics import TaskSink, QUANTILES
 from batch import BatchScheduler
 from late import LateScheduler
 from latepro import LateProScheduler
+import fastsim
+import speculation
+import faults
+import policies
+import arrivals
+import cluster
+import tenants
+import netmodel
+import streams
+import tracefile
 
 
 def ms(x):
     return float(x)
 
 
-def make_scheduler_class(mode):
-    if mode == "batch":
-        return BatchScheduler
+def make_scheduler_class(mode, policy="batch", ranking="count"):
+    # policy / ranking: names from policies.POLICIES / policies.RANKING
+    if mode in ("batch", "spec", "steal"):
+        # spec / steal: batch placement plus backup copies / stealing workers
+        cls = BatchScheduler
     elif mode == "late":
-        return LateScheduler
+        cls = LateScheduler
     elif mode == "latepro":
-        return LateProScheduler
+        cls = LateProScheduler
     else:
         raise ValueError("unknown mode")
+    if policy == cls.policy_name and ranking == cls.ranking:
+        return cls
+    policies.make_policy(policy, ranking)     # unknown names fail here
+    return type(f"{cls.__name__}_{policy}_{ranking}", (cls,),
+                {"policy_name": policy, "ranking": ranking})
 
 
-def make_sampler(kind, params):
-    # returns a zero-arg function that samples tasks-per-job
+def make_sampler(kind, params, rng=random):
+    # returns a zero-arg function that samples tasks-per-job from rng
     if kind == "mixed":
         def sampler():
-            r = random.random()
+            r = rng.random()
             if r < 0.7:
-                return random.randint(1, min(5, params.get("max", 100)))
+                return rng.randint(1, min(5, params.get("max", 100)))
             elif r < 0.9:
-                return random.randint(6, min(20, params.get("max", 100)))
+                return rng.randint(6, min(20, params.get("max", 100)))
             else:
-                return random.randint(21, min(200, params.get("max", 2000)))
+                return rng.randint(21, min(200, params.get("max", 2000)))
         return sampler
     elif kind == "uniform":
         def sampler():
-            return random.randint(params.get("lo", 1), params.get("hi", 10))
+            return rng.randint(params.get("lo", 1), params.get("hi", 10))
         return sampler
     elif kind == "powerlaw":
         choices = params.get("choices", [1,2,3,4,8,16,32,64,128])
@@ -46,7 +64,7 @@ def make_sampler(kind, params):
         if weights is None:
             weights = [1.0/(i+1) for i in range(len(choices))]
         def sampler():
-            return random.choices(choices, weights=weights)[0]
+            return rng.choices(choices, weights=weights)[0]
         return sampler
     else:
         def sampler():
@@ -54,23 +72,192 @@ def make_sampler(kind, params):
         return sampler
 
 
-def run_sim(num_workers, num_scheds, jobs, probe, ndelay, mode, jobsize_kind, js_params, seed=42):
-    random.seed(seed)
-    env = simpy.Environment()
+def mean_job_size(kind, params):
+    # expected value of make_sampler(kind, params)()
+    def span(lo, hi):
+        return (lo + hi) / 2.0
+    if kind == "mixed":
+        return (0.7 * span(1, min(5, params.get("max", 100)))
+                + 0.2 * span(6, min(20, params.get("max", 100)))
+                + 0.1 * span(21, min(200, params.get("max", 2000))))
+    elif kind == "uniform":
+        return span(params.get("lo", 1), params.get("hi", 10))
+    elif kind == "powerlaw":
+        choices = params.get("choices", [1,2,3,4,8,16,32,64,128])
+        weights = params.get("weights", None)
+        if weights is None:
+            weights = [1.0/(i+1) for i in range(len(choices))]
+        return sum(c * w for c, w in zip(choices, weights)) / sum(weights)
+    else:
+        return float(int(params.get("fixed", 3)))
+
+
+def speed_groups(workers, now, groups=4):
+    """Per speed class: workers, share of capacity / of work done, util.
+
+    More than `groups` distinct speeds (lognormal) are cut into `groups`
+    equal-size bands. Batch placement balances task counts, so a slow class
+    doing more than its capacity share of the work is being over-assigned."""
+    ws = sorted(workers, key=lambda w: w.speed)
+    if len({w.speed for w in ws}) <= groups:
+        bands = {}
+        for w in ws:
+            bands.setdefault(w.speed, []).append(w)
+        bands = list(bands.values())
+    else:
+        k = len(ws)
+        bands = [ws[i * k // groups:(i + 1) * k // groups] for i in range(groups)]
+    total_cap = cluster.capacity(workers) or 1.0
+    total_work = sum(w.work for w in workers) or 1.0
+    out = []
+    for band in bands:
+        lo, hi = band[0].speed, band[-1].speed
+        slot_time = now * sum(w.slots or 1 for w in band)
+        out.append({
+            "speed": f"{lo:.2f}" if lo == hi else f"{lo:.2f}-{hi:.2f}",
+            "workers": len(band),
+            "cap_share": cluster.capacity(band) / total_cap,
+            "work_share": sum(w.work for w in band) / total_work,
+            "util": 100.0 * sum(w.busy_time for w in band) / slot_time if slot_time else 0.0,
+        })
+    return out
+
 
-    workers = [Worker(env, i, ndelay) for i in range(num_workers)]
-    SchedulerClass = make_scheduler_class(mode)
+def trace_feeder(env, scheds, records):
+    # hand trace jobs to the schedulers round-robin at their arrival times
+    n = len(scheds)
+    for k, (arrival, durs) in enumerate(records):
+        if arrival > env.now:
+            yield env.timeout(arrival - env.now)
+        scheds[k % n].submit(k // n, durs)
 
-    sampler = make_sampler(jobsize_kind, js_params)
+
+def run_sim(num_workers, num_scheds, jobs, probe, ndelay, mode, jobsize_kind, js_params, seed=42,
+            engine="simpy", slots=None, arrival="closed", load=0.8, arr_params=None,
+            trace=None, spill=None, heavy_ms=None, steal=0,
+            spec=0.0, spec_factor=2.0, spec_progress=0.75, rank="count",
+            policy="batch", cluster_kind=None, cluster_params=None,
+            tenant_mix=None, sharing="fifo", fault_params=None,
+            net_kind=None, net_params=None, crn=True):
+    # trace: SPTR file (tracefile.py) replacing jobs/arrivals/jobsize/durations
+    # spill: CSV path that gets every task record (memory use stays flat either way)
+    # heavy_ms: tasks longer than this are "heavy" (default: mean task duration)
+    # steal: idle workers probe this many peers and steal queued tasks (needs slots)
+    # spec: speculation budget as a fraction of cluster slots (speculation.py);
+    #   a task is a straggler after spec_factor x the expected response time,
+    #   or once its job is spec_progress done
+    # rank: order probed workers by queued task "count" or by estimated "wait" (ms)
+    # policy: sampling + placement from policies.POLICIES (batch = the original)
+    # cluster_kind: worker speeds / slots (cluster.py): "homogeneous" (None),
+    #   "two_gen", "lognormal" or a cluster file; cluster_params tune them
+    # tenant_mix: tenants.MIXES name or tenant file (job sizes come from the
+    #   tenants then); sharing: worker queue order between them, tenants.SHARING
+    # fault_params: faults.Faults / faults.Recovery settings (mtbf, mttr, loss,
+    #   partition_every, partition_ms, partition_frac, task_timeout,
+    #   rpc_timeout, blacklist_ms); no crash / loss / partition rate = no faults
+    # net_kind: message delays (netmodel.py): "fixed" (None) = ndelay, "lognormal",
+    #   "rack", or a host list / latency histogram file; net_params tune them
+    # crn: common random numbers, every mode gets the same jobs for a seed
+    #   (streams.py); False draws a separate workload per mode
+    if trace is not None and arrival != "closed":
+        raise ValueError("a trace brings its own arrivals; leave arrival='closed'")
+    if mode == "steal":
+        mode = "batch"
+        steal = steal or 2
+    if mode == "spec":
+        mode = "batch"
+        spec = spec or 0.1
+    if spec and steal:
+        raise ValueError("speculation and work stealing cannot be combined "
+                         "(a stolen original would escape the kill)")
+    if spec and engine == "fast":
+        raise ValueError("speculation is only modelled by the simpy engine")
+    fp = dict(fault_params or {})
+    recovery_kw = {k: fp.pop(k) for k in ("task_timeout", "rpc_timeout", "blacklist_ms")
+                   if k in fp}
+    faulty = fp.get("mtbf", 0) > 0 or fp.get("loss", 0) > 0 or fp.get("partition_every", 0) > 0
+    if faulty and engine == "fast":
+        raise ValueError("faults are only modelled by the simpy engine")
+    network = netmodel.make_network(net_kind, ndelay, seed, net_params, num_workers)
+    if sharing not in tenants.SHARING:
+        raise ValueError(f"unknown sharing: {sharing}")
+    mix = tenants.make_tenants(tenant_mix)
+    shapes = cluster.make_cluster(cluster_kind, num_workers, slots, seed, cluster_params)
+    if steal and any(sl is None for _, sl in shapes):
+        raise ValueError("work stealing needs --slots (unlimited workers never queue)")
+    sink = TaskSink(spill, MEAN_DURATION if heavy_ms is None else heavy_ms)
+    if engine == "fast":
+        # same event order and random draws as SimPy, without per-RPC generators
+        env = fastsim.Engine()
+        WorkerClass = fastsim.FastWorker
+        SchedulerClass = fastsim.FastScheduler
+    else:
+        env = simpy.Environment()
+        WorkerClass = Worker
+        SchedulerClass = make_scheduler_class(mode, policy, rank)
+    workers = [WorkerClass(env, i, ndelay, sl, sink, speed, seed)
+               for i, (speed, sl) in enumerate(shapes)]
+
+    for w in workers:
+        w.peers = workers
+        w.steal = steal
+        w.killable = bool(spec) or faulty
+        w.sharing = sharing
+        w.network = network
+
+    # crashes, message loss and partitions; their own random stream
+    injector = None
+    if faulty:
+        injector = faults.Faults(env, workers, seed=seed, jobs=jobs * num_scheds, **fp)
+    for w in workers:
+        w.faults = injector
+
+    # open loop: `load` x cluster capacity, split evenly over the schedulers
+    mean_tasks = tenants.mean_tasks(mix) if mix else mean_job_size(jobsize_kind, js_params)
+    rate = load * arrivals.capacity_rate(cluster.capacity(workers), MEAN_DURATION, mean_tasks)
+    total_slots = sum(w.slots or 1 for w in workers)
 
     scheds = []
     for i in range(num_scheds):
-        sch = SchedulerClass(env, f"S{i}", workers, ndelay, mode, jobs, probe, seed=i+seed)
-        sch.m_job_sampler = sampler
+        sch = SchedulerClass(env, f"S{i}", workers, ndelay, mode,
+                             0 if trace else jobs, probe, seed=seed)
+        if not crn:
+            sch.workload = streams.Workload(seed, sch.name, DURATIONS, DURATION_WEIGHTS,
+                                            salt=mode)
+        sch.m_job_sampler = make_sampler(jobsize_kind, js_params, sch.workload.sizes)
+        sch.tenants = mix
+        sch.metrics = sink
+        sch.network = network
+        if engine == "fast":
+            sch.policy = policies.make_policy(policy, rank)
+        sch.arrivals = arrivals.make_arrivals(arrival, rate / num_scheds, arr_params,
+                                              sch.workload.arrivals)
+        if spec:
+            # Hopper: the speculation budget is split evenly over the schedulers
+            budget = max(1, round(spec * total_slots / num_scheds))
+            sch.spec = speculation.Speculator(sch, budget, spec_factor, spec_progress)
+        if injector is not None:
+            sch.faults = injector
+            sch.recovery = faults.Recovery(sch, injector, **recovery_kw)
         scheds.append(sch)
+    network.place(workers, scheds)
 
-    # run long enough
-    env.run(until=ms(jobs * js_params.get("max", 100) * 200 + 20000))
+    if trace is not None:
+        records = tracefile.read_trace(trace)
+        if engine == "fast":
+            fastsim.TraceFeeder(env, scheds, records)
+        else:
+            env.process(trace_feeder(env, scheds, records))
+        # replay until every traced job is done
+        if injector is not None:
+            # faults stop with the last traced job
+            injector.jobs_left = tracefile.trace_info(trace)["jobs"]
+            if not injector.jobs_left:
+                injector.finished.succeed()
+        env.run()
+    else:
+        # run long enough
+        env.run(until=ms(jobs * js_params.get("max", 100) * 200 + 20000))
 
     # collect scheduler metrics
     S = [s.results() for s in scheds]
@@ -78,20 +265,32 @@ def run_sim(num_workers, num_scheds, jobs, probe, ndelay, mode, jobsize_kind, js
     avg_completion = statistics.mean([s["completion"] for s in S]) if S else 0.0
     avg_rpc_per_job = statistics.mean([s["rpc_per_job"] for s in S]) if S else 0.0
 
-    # collect task metrics from workers
-    all_tasks = []
-    for w in workers:
-        all_tasks.extend(w.task_metrics)
+    # worker-to-worker steal traffic (probes + steals), spread over all jobs
+    steal_rpc = sum(w.steal_probes + w.steal_rpcs for w in workers)
+    jobs_done = sum(s.job_stats.completion.n for s in scheds)
+    steal_rpc_per_job = steal_rpc / jobs_done if jobs_done else 0.0
+    avg_rpc_per_job += steal_rpc_per_job
 
-    task_wait = statistics.mean([t["wait"] for t in all_tasks]) if all_tasks else 0.0
-    task_resp = statistics.mean([t["response"] for t in all_tasks]) if all_tasks else 0.0
-    task_service = statistics.mean([t["duration"] for t in all_tasks]) if all_tasks else 0.0
+    # task metrics, streamed by the workers into the shared sink
+    sink.close()
+    task_wait = sink.wait.mean
+    task_resp = sink.response.mean
+    task_service = sink.service.mean
+    tails = sink.tails()
 
     total_busy = sum([w.busy_time for w in workers])
-    total_time = env.now * len(workers) if env.now > 0 else 1.0
+    total_time = env.now * total_slots if env.now > 0 else 1.0
     util = (total_busy / total_time) * 100.0
 
-    qlens = [w.running + len(w.reservations) for w in workers]
+    # speculation: backup copies and the slot time their losers burnt
+    spec_stats = [s.spec.results() for s in scheds if s.spec is not None]
+    spec_wasted = sum(r["wasted_ms"] for r in spec_stats)
+
+    # faults and what the schedulers did about them
+    fault_stats = injector.results() if injector is not None else {}
+    rec_stats = [s.recovery.results() for s in scheds if s.recovery is not None]
+
+    qlens = [w.running + len(w.queue) + len(w.reservations) for w in workers]
     imbalance = (max(qlens) + 1) / (min(qlens) + 1) if workers else 1.0
 
     return {
@@ -102,7 +301,28 @@ def run_sim(num_workers, num_scheds, jobs, probe, ndelay, mode, jobsize_kind, js
         "task_service": task_service,
         "util": util,
         "imbalance": imbalance,
+        "steal_rpc": steal_rpc,
+        "steal_rpc_per_job": steal_rpc_per_job,
+        "stolen_tasks": sum(w.stolen for w in workers),
+        "spec_copies": sum(r["copies"] for r in spec_stats),
+        "spec_wins": sum(r["wins"] for r in spec_stats),
+        "spec_kills": sum(r["kills"] for r in spec_stats),
+        "spec_wasted_ms": spec_wasted,
+        "spec_wasted_frac": spec_wasted / total_busy if total_busy else 0.0,
+        "crashes": fault_stats.get("crashes", 0),
+        "lost_tasks": fault_stats.get("lost_tasks", 0),
+        "lost_msgs": fault_stats.get("lost_msgs", 0),
+        "partitions": fault_stats.get("partitions", 0),
+        "rpc_timeouts": sum(r["timeouts"] for r in rec_stats),
+        "tasks_replaced": sum(r["replaced"] for r in rec_stats),
+        "blacklisted": sum(r["blacklisted"] for r in rec_stats),
         "sim_time": env.now,
+        "speed_groups": speed_groups(workers, env.now),
+        # percentiles over all jobs / tasks, then split by class
+        **{f"completion_{q}": tails["completion"]["all"][q] for q, _ in QUANTILES},
+        **{f"task_wait_{q}": tails["task_wait"]["all"][q] for q, _ in QUANTILES},
+        "tails": tails,
+        "hists": sink.hists(),
         "sched_results": S,
     }
 
@@ -113,21 +333,133 @@ if __name__ == '__main__':
     p.add_argument('--schedulers', type=int, default=3)
     p.add_argument('--jobs', type=int, default=200)
     p.add_argument('--probe', type=int, default=2)
-    p.add_argument('--mode', choices=['batch','late','latepro'], default='batch')
+    p.add_argument('--mode', choices=['batch','late','latepro','steal','spec'], default='batch')
     p.add_argument('--ndelay', type=float, default=1.0)
     p.add_argument('--jobsize', choices=['mixed','uniform','powerlaw','fixed'], default='mixed')
     p.add_argument('--jobsize_max', type=int, default=200)
     p.add_argument('--jobsize_lo', type=int, default=1)
     p.add_argument('--jobsize_hi', type=int, default=8)
     p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--no_crn', action='store_true',
+                   help='draw a separate workload per mode instead of common random numbers')
+    p.add_argument('--engine', choices=['simpy','fast'], default='simpy',
+                   help='fast: heap-based event engine, same results as simpy, '
+                        '1.7-2.5x faster (no --spec or faults)')
+    p.add_argument('--slots', type=int, default=None,
+                   help='execution slots per worker (default: unlimited)')
+    p.add_argument('--arrival', choices=arrivals.KINDS, default='closed',
+                   help='closed: next job when the previous one is done')
+    p.add_argument('--load', type=float, default=0.8,
+                   help='open loop: offered load as a fraction of cluster capacity')
+    p.add_argument('--trace', default=None,
+                   help='replay an SPTR job trace (tracefile.py); ignores --jobs/--jobsize')
+    p.add_argument('--spill', default=None,
+                   help='also write every task record to this CSV file')
+    p.add_argument('--heavy_ms', type=float, default=None,
+                   help='task duration above which a task/job counts as heavy')
+    p.add_argument('--steal', type=int, default=0,
+                   help='idle workers probe K peers and steal queued tasks (needs --slots; '
+                        'any mode, --mode steal = batch with K=2)')
+    p.add_argument('--spec', type=float, default=0.0,
+                   help='speculative copies budget, fraction of cluster slots '
+                        '(any mode, --mode spec = batch with 0.1); also runs a baseline')
+    p.add_argument('--spec_factor', type=float, default=2.0,
+                   help='straggler: out longer than this x the expected task response')
+    p.add_argument('--spec_progress', type=float, default=0.75,
+                   help='straggler: its job is at least this fraction done')
+    p.add_argument('--policy', choices=sorted(policies.POLICIES), default='batch',
+                   help='worker sampling + placement (policies.py)')
+    p.add_argument('--rank', choices=['count','wait'], default='count',
+                   help='rank probed workers by queued tasks or by estimated wait (ms)')
+    p.add_argument('--mmpp_burst', type=float, default=10.0)
+    p.add_argument('--mmpp_high', type=float, default=0.1)
+    p.add_argument('--mmpp_dwell', type=float, default=None,
+                   help='mean burst length in ms (default: 20 mean gaps)')
+    p.add_argument('--tenants', default='none',
+                   help='tenant mix: none, ' + ', '.join(sorted(tenants.MIXES))
+                        + ' or a tenant file (tenants.py); replaces --jobsize')
+    p.add_argument('--sharing', choices=tenants.SHARING, default='fifo',
+                   help='worker queue order between tenants')
+    p.add_argument('--mtbf', type=float, default=0.0,
+                   help='faults: mean ms between crashes of a worker (0 = never)')
+    p.add_argument('--mttr', type=float, default=1000.0,
+                   help='faults: mean ms a crashed worker stays down')
+    p.add_argument('--loss', type=float, default=0.0,
+                   help='faults: probability that a scheduler<->worker message is lost')
+    p.add_argument('--partition_every', type=float, default=0.0,
+                   help='faults: mean ms between network partitions (0 = never)')
+    p.add_argument('--partition_ms', type=float, default=500.0)
+    p.add_argument('--partition_frac', type=float, default=0.2,
+                   help='faults: fraction of the workers a partition cuts off')
+    p.add_argument('--task_timeout', type=float, default=500.0,
+                   help='recovery: ms without DONE before a task is checked on')
+    p.add_argument('--rpc_timeout', type=float, default=20.0,
+                   help='recovery: ms to wait for an RPC reply')
+    p.add_argument('--blacklist_ms', type=float, default=2000.0,
+                   help='recovery: ms a worker that did not answer is not probed')
+    p.add_argument('--cluster', default='homogeneous',
+                   help='worker speeds/slots: homogeneous, two_gen, lognormal '
+                        'or a cluster file (cluster.py)')
+    p.add_argument('--slow_frac', type=float, default=0.5,
+                   help='two_gen: fraction of workers in the old generation')
+    p.add_argument('--slow_speed', type=float, default=0.5,
+                   help='two_gen: speed of the old generation')
+    p.add_argument('--slow_slots', type=int, default=None,
+                   help='two_gen: slots of the old generation (default: --slots)')
+    p.add_argument('--speed_sigma', type=float, default=0.3,
+                   help='lognormal: shape of the speed distribution (mean 1)')
+    p.add_argument('--net', default='fixed',
+                   help='message delays: fixed (--ndelay), lognormal, rack, or a host '
+                        'list (e.g. ../IPs.txt) / latency histogram file (netmodel.py)')
+    p.add_argument('--net_sigma', type=float, default=1.0,
+                   help='lognormal: shape of the delay distribution (mean --ndelay)')
+    p.add_argument('--host_ms', type=float, default=0.05,
+                   help='topology: delay between endpoints on the same host')
+    p.add_argument('--rack_ms', type=float, default=None,
+                   help='topology: delay across racks (default 3 x --ndelay)')
+    p.add_argument('--zone_ms', type=float, default=None,
+                   help='topology: delay across zones (default 10 x --ndelay)')
+    p.add_argument('--jitter', type=float, default=0.0,
+                   help='topology: lognormal jitter shape on every delay (0 = none)')
+    p.add_argument('--bandwidth', type=float, default=0.0,
+                   help='Gbit/s per link, adds serialization time (0 = unlimited)')
+    p.add_argument('--oversub', type=float, default=1.0,
+                   help='topology: bandwidth divisor for links leaving a rack')
+    p.add_argument('--task_kb', type=float, default=0.0,
+                   help='KB a task description adds to ASSIGN / steal messages')
     args = p.parse_args()
 
     js_params = {"max": args.jobsize_max, "lo": args.jobsize_lo, "hi": args.jobsize_hi}
+    arr_params = {"burst": args.mmpp_burst, "high": args.mmpp_high}
+    if args.mmpp_dwell is not None:
+        arr_params["dwell"] = args.mmpp_dwell
+    cluster_params = {"slow_frac": args.slow_frac, "slow_speed": args.slow_speed,
+                      "slow_slots": args.slow_slots, "sigma": args.speed_sigma}
+    sim_kw = {"rank": args.rank, "policy": args.policy,
+              "cluster_kind": args.cluster, "cluster_params": cluster_params,
+              "tenant_mix": args.tenants, "sharing": args.sharing,
+              "fault_params": {k: getattr(args, k) for k in (
+                  "mtbf", "mttr", "loss", "partition_every", "partition_ms",
+                  "partition_frac", "task_timeout", "rpc_timeout", "blacklist_ms")},
+              "crn": not args.no_crn,
+              "net_kind": args.net,
+              "net_params": {"sigma": args.net_sigma, "host_ms": args.host_ms,
+                             "rack_ms": args.rack_ms, "zone_ms": args.zone_ms,
+                             "jitter": args.jitter, "bandwidth": args.bandwidth,
+                             "oversub": args.oversub, "task_kb": args.task_kb}}
 
     print('\n=== Running Sparrow multi-module simulation ===')
     print(f'Workers: {args.workers}  Schedulers: {args.schedulers}  Jobs: {args.jobs}  Mode: {args.mode}  Probe: {args.probe}')
+    if args.arrival != 'closed':
+        print(f'Arrivals: {args.arrival} at {args.load:.0%} of capacity')
+    if args.cluster != 'homogeneous':
+        print(f'Cluster: {args.cluster}')
+    if args.tenants != 'none':
+        print(f'Tenants: {args.tenants}  sharing: {args.sharing}')
+    if args.net != 'fixed' or args.bandwidth:
+        print(f'Network: {args.net}' + (f'  {args.bandwidth:g} Gbit/s' if args.bandwidth else ''))
 
-    out = run_sim(
+    sim_args = [
         args.workers,
         args.schedulers,
         args.jobs,
@@ -136,8 +468,19 @@ if __name__ == '__main__':
         args.mode,
         args.jobsize,
         js_params,
-        args.seed
-    )
+        args.seed,
+        args.engine,
+        args.slots,
+        args.arrival,
+        args.load,
+        arr_params,
+        args.trace,
+        args.spill,
+        args.heavy_ms,
+        args.steal
+    ]
+    out = run_sim(*sim_args, spec=args.spec, spec_factor=args.spec_factor,
+                  spec_progress=args.spec_progress, **sim_kw)
 
     print('\n=== RESULTS ===')
     print(f"Avg completion: {out['avg_completion']:.2f} ms")
@@ -146,3 +489,36 @@ if __name__ == '__main__':
     print(f"Task resp (avg): {out['task_resp']:.2f} ms")
     print(f"Task service (avg): {out['task_service']:.2f} ms")
     print(f"Worker util: {out['util']:.2f}%  imbalance: {out['imbalance']:.2f}")
+    if out['crashes'] or out['lost_msgs'] or out['partitions']:
+        print(f"Faults:         {out['crashes']} crashes ({out['lost_tasks']} tasks lost), "
+              f"{out['lost_msgs']} messages lost, {out['partitions']} partitions")
+        print(f"Recovery:       {out['rpc_timeouts']} RPC timeouts, "
+              f"{out['tasks_replaced']} tasks re-placed, {out['blacklisted']} blacklistings")
+    if out['steal_rpc']:
+        print(f"Steal RPCs:     {out['steal_rpc']}  ({out['steal_rpc_per_job']:.2f}/job, "
+              f"{out['stolen_tasks']} tasks stolen)")
+    if len(out['speed_groups']) > 1:
+        print(f"{'Speed':<12}{'workers':>8}{'capacity':>10}{'work':>8}{'util':>8}")
+        for g in out['speed_groups']:
+            print(f"  {g['speed']:<10}{g['workers']:>8}{g['cap_share']:>10.1%}"
+                  f"{g['work_share']:>8.1%}{g['util']:>7.1f}%")
+    if out['spec_copies'] or args.spec or args.mode == 'spec':
+        # same seed without speculation, for the p99 comparison
+        sim_args[5] = 'batch' if args.mode == 'spec' else args.mode
+        sim_args[15] = None
+        base = run_sim(*sim_args, **sim_kw)
+        print(f"Speculation:    {out['spec_copies']} copies, {out['spec_wins']} won, "
+              f"{out['spec_kills']} killed")
+        print(f"Wasted work:    {out['spec_wasted_ms']:.1f} ms "
+              f"({out['spec_wasted_frac']:.2%} of busy time)")
+        p99, p99_base = out['completion_p99'], base['completion_p99']
+        change = (p99 - p99_base) / p99_base if p99_base else 0.0
+        print(f"p99 completion: {p99:.2f} ms, {p99_base:.2f} ms without speculation "
+              f"({change:+.1%}, one seed: use sweep.py --grid spec=... to average)")
+
+    print('\n=== TAIL LATENCY (ms) ===')
+    head = "".join(f"{q:>9}" for q, _ in QUANTILES)
+    for metric, title in (("completion", "Job completion"), ("task_wait", "Task wait")):
+        print(f"{title:<22}{'n':>8}{head}")
+        for cls, t in out["tails"][metric].items():
+            print(f"  {cls:<20}{t['n']:>8}" + "".join(f"{t[q]:>9.2f}" for q, _ in QUANTILES))
@@ -0,0 +1,170 @@
+# speculation.py
+"""
+Hopper-style speculative execution for straggling tasks.
+
+A Speculator sits next to one scheduler (sch.spec, set by simulation.py).
+Once a task is bound to a worker it is a straggler when either
+
+- it has been out longer than `factor` x the expected task response time
+  (running mean over this scheduler's finished tasks), or
+- its job is at least `progress` done, so the remaining tasks decide the
+  job's completion time.
+
+A straggler gets one backup copy on the least loaded of d probed workers
+(never its own worker). The first copy to report back wins and the other
+one is killed (dropped from the queue, or aborted if already running).
+At most `budget` copies are in flight per scheduler; when the budget is
+used up, waiting stragglers are served smallest-remaining-job first, as in
+Hopper.
+
+Both copies do the same work: the job's durations are drawn up front
+(streams.Workload) and travel with both. Without slots a copy only overtakes its
+original from a faster worker (cluster.py); on a homogeneous cluster
+speculation can then only waste work.
+"""
+import simpy
+
+from metrics import Moments
+from worker import MEAN_DURATION
+
+def ms(x):
+    return float(x)
+
+# task states
+IDLE, WAITING, LAUNCHED = 0, 1, 2
+
+
+class Speculator:
+
+    def __init__(self, sched, budget, factor=2.0, progress=0.75):
+        self.sched = sched
+        self.env = sched.env
+        self.budget = budget
+        self.factor = factor
+        self.progress = progress
+
+        self.tasks = {}          # (jobid, tid) -> [bound_at, worker, dur, copy worker, state]
+        self.pending = {}        # jobid -> tids bound but not finished
+        self.done_count = {}     # jobid -> finished tasks
+        self.waiting = []        # stragglers waiting for budget
+        self.inflight = 0
+        self.response = Moments()     # bound -> reported, finished tasks
+
+        # report
+        self.copies = 0
+        self.wins = 0            # the copy finished first
+        self.kills = 0
+        self.wasted = 0.0        # ms of slot time spent on losing copies
+
+    def expected(self):
+        if self.response.n:
+            return self.response.mean
+        return MEAN_DURATION + 2 * self.sched.nd
+
+    # ---------------------------------------------------------
+    # Scheduler hooks
+    # ---------------------------------------------------------
+    def track(self, jobid, tid, w, dur):
+        """Task `tid` was bound to worker `w`."""
+        ev = self.sched.wait_events.get((jobid, tid))
+        if ev is None or ev.triggered:
+            return
+        self.tasks[(jobid, tid)] = [self.env.now, w, dur, None, IDLE]
+        self.pending.setdefault(jobid, set()).add(tid)
+        self.env.process(self._timer((jobid, tid)))
+
+    def done(self, jobid, tid, worker):
+        """First report of a task (later ones are losing copies)."""
+        rec = self.tasks.pop((jobid, tid), None)
+        if rec is None:
+            return
+        self.response.add(self.env.now - rec[0])
+        self.pending[jobid].discard(tid)
+        self.done_count[jobid] = self.done_count.get(jobid, 0) + 1
+
+        copy = rec[3]
+        if copy is not None:
+            if worker is copy:
+                self.wins += 1
+                loser = rec[1]
+            else:
+                loser = copy
+            self.env.process(self._kill(loser, jobid, tid, rec[2]))
+            self.inflight -= 1
+            self._launch()
+
+        tasks = self.sched.jobinfo[jobid]["tasks"]
+        if self.done_count[jobid] >= self.progress * tasks:
+            for t in sorted(self.pending[jobid]):
+                if self.tasks[(jobid, t)][4] == IDLE:
+                    self._request((jobid, t))
+
+    def forget(self, jobid):
+        self.pending.pop(jobid, None)
+        self.done_count.pop(jobid, None)
+
+    # ---------------------------------------------------------
+    # Stragglers
+    # ---------------------------------------------------------
+    def _timer(self, key):
+        yield self.env.timeout(ms(self.factor * self.expected()))
+        rec = self.tasks.get(key)
+        if rec is not None and rec[4] == IDLE:
+            self._request(key)
+
+    def _request(self, key):
+        self.tasks[key][4] = WAITING
+        self.waiting.append(key)
+        self._launch()
+
+    def _launch(self):
+        while self.inflight < self.budget and self.waiting:
+            # Hopper: the job with the fewest tasks left goes first
+            key = min(self.waiting, key=lambda k: len(self.pending.get(k[0], ())))
+            self.waiting.remove(key)
+            rec = self.tasks.get(key)
+            if rec is None:
+                continue
+            rec[4] = LAUNCHED
+            self.inflight += 1
+            self.env.process(self._copy(key, rec))
+
+    def _copy(self, key, rec):
+        sched = self.sched
+        orig = rec[1]
+        sampled = sched.rng.sample(sched.workers, min(len(sched.workers), sched.d + 1))
+        cands = [w for w in sampled if w is not orig][:max(1, sched.d)]
+        target = None
+        if cands:
+            probes = [self.env.process(sched.rpc_probe(w)) for w in cands]
+            res = yield simpy.AllOf(self.env, probes)
+            qlist = [(sched.policy.key(rep), i) for i, rep in enumerate(res.values())
+                     if rep is not None]
+            if qlist:
+                target = cands[min(qlist)[1]]
+        if target is None or key not in self.tasks:
+            # no other worker (that answered), or the original finished while we probed
+            self.inflight -= 1
+            self._launch()
+            return
+        rec[3] = target
+        self.copies += 1
+        jobid, tid = key
+        tenant = sched.jobinfo[jobid]["tenant"]
+        yield self.env.process(sched.rpc_assign(target, jobid, tid, rec[2], tenant))
+
+    def _kill(self, w, jobid, tid, dur):
+        self.sched.rpc_total += 1
+        self.kills += 1
+        yield self.env.timeout(ms(self.sched.network.delay(self.sched, w)))
+        if self.sched.faults is not None and not self.sched.faults.deliver(w):
+            return               # kill lost: the loser runs on, its DONE is ignored
+        rep = w.handle_kill(jobid, tid)
+        yield self.env.timeout(ms(self.sched.network.delay(w, self.sched)))
+        kind, _, spent = rep.partition(" ")
+        # NONE: the loser had already run to completion
+        self.wasted += dur / w.speed if kind == "NONE" else float(spent)
+
+    def results(self):
+        return {"copies": self.copies, "wins": self.wins,
+                "kills": self.kills, "wasted_ms": self.wasted}
@@ -0,0 +1,93 @@
+# streams.py
+"""
+Random number streams for the simulator.
+
+Every component draws from its own stream, seeded from the run seed with
+numpy's SeedSequence and a spawn key naming the component:
+
+    WORKLOAD   per scheduler: arrival gaps, tenants, job sizes, task durations
+    POLICY     per scheduler: which workers it samples (speculation included)
+    WORKER     per worker: work-stealing peers, durations it samples itself
+    FAULTS, NETWORK, CLUSTER   one each per run
+
+A stream depends only on (seed, component, name), not on how many numbers
+the other components drew, and names are hashed with crc32 instead of
+hash(), so a seed gives the same run in every process (no PYTHONHASHSEED).
+
+Common random numbers: the workload streams do not depend on the mode, so
+batch, late and latepro get identical jobs for the same seed (same arrival
+times, sizes and task durations) and a paired comparison needs far fewer
+seeds. run_sim(crn=False) salts them with the mode instead.
+
+Stream is a random.Random whose random() hands out uniforms that numpy
+draws BATCH at a time, so sample(), choice(), expovariate() etc. work on
+it unchanged. Task durations are drawn vectorized as well.
+"""
+import random
+import zlib
+
+import numpy as np
+
+WORKLOAD, POLICY, WORKER, FAULTS, NETWORK, CLUSTER = range(6)
+BATCH = 256              # uniforms per refill (small: one stream per worker)
+TASK_BATCH = 4096        # durations per refill
+
+# workload sub-streams
+ARRIVALS, SIZES, TENANTS, TASKS = range(4)
+
+
+def key_of(name):
+    return name if isinstance(name, int) else zlib.crc32(str(name).encode())
+
+
+def generator(seed, *key):
+    """numpy Generator of the stream (seed, *key); seed None = fresh entropy."""
+    ss = np.random.SeedSequence(seed, spawn_key=tuple(key_of(k) for k in key))
+    return np.random.Generator(np.random.PCG64(ss))
+
+
+class Stream(random.Random):
+
+    def __init__(self, seed, *key):
+        self.key = (seed, *key)
+        self.gen = None          # made on the first draw: most worker streams see few
+        self.buf = iter(())
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        pass                 # seeded by the SeedSequence, not by random.seed()
+
+    def random(self):
+        try:
+            return next(self.buf)
+        except StopIteration:
+            if self.gen is None:
+                self.gen = generator(*self.key)
+            self.buf = iter(self.gen.random(BATCH).tolist())
+            return next(self.buf)
+
+
+class Workload:
+    """What one scheduler's jobs are made of; one sub-stream per quantity,
+    so e.g. drawing more durations never shifts the job sizes."""
+
+    def __init__(self, seed, name, durations, weights, salt=None):
+        key = (WORKLOAD, name) if salt is None else (WORKLOAD, name, salt)
+        self.arrivals = Stream(seed, *key, ARRIVALS)
+        self.sizes = Stream(seed, *key, SIZES)
+        self.tenants = Stream(seed, *key, TENANTS)
+        self.gen = generator(seed, *key, TASKS)
+        self.values = durations  # task service times (ms) and their probabilities
+        self.weights = weights
+        self.durs = []
+        self.i = 0
+
+    def durations(self, n):
+        """Service times (ms) of the next n tasks."""
+        if self.i + n > len(self.durs):
+            fresh = self.gen.choice(self.values, size=max(TASK_BATCH, n), p=self.weights)
+            self.durs = self.durs[self.i:] + fresh.tolist()
+            self.i = 0
+        out = self.durs[self.i:self.i + n]
+        self.i += n
+        return out
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep over run_sim().
+
+A sweep is a grid: every combination of the listed values is one point, and
+each point is run once per seed on a process pool. Per-run results go to a
+JSONL file; seed-averaged rows go to a CSV in the same format as the old
+run_experiments/*.sh output, so the plot scripts read it unchanged, plus
+tail-latency columns merged over the seeds:
+
+    <x>,mode,completion,rpc,task_wait,task_resp,task_service,
+    completion_p50..p999,task_wait_p50..p999,completion_p99_short/heavy
+
+Parameter names are the simulation.py CLI names (workers, schedulers, jobs,
+probe, mode, ndelay, jobsize, jobsize_max, jobsize_lo, jobsize_hi, engine,
+slots, arrival, load, mmpp_burst, mmpp_high, trace, steal, spec, spec_factor,
+spec_progress, rank, policy, cluster, slow_frac, slow_speed, slow_slots,
+speed_sigma, tenants, sharing, mtbf, mttr, loss, partition_every,
+partition_ms, partition_frac, task_timeout, rpc_timeout, blacklist_ms, net,
+net_sigma, host_ms, rack_ms, zone_ms, jitter, bandwidth, oversub, task_kb,
+crn).
+
+    python3 sweep.py jobs                    # same sweep as run_experiments.sh
+    python3 sweep.py probe --seeds 3 --engine fast
+    python3 sweep.py load --grid arrival=poisson,mmpp      # latency vs load
+    python3 sweep.py --x ndelay --grid ndelay=0.5,1,2,5 --grid mode=batch,late
+    python3 sweep.py load --grid policy=batch,per_task,sticky --grid mode=batch
+    python3 sweep.py probe --grid net=fixed,lognormal --grid mode=batch,late
+
+Adaptive replication: with --ci-target, each point starts with --min-seeds
+seeds and gets more (seed+1, seed+2, ... as usual) in rounds until the 95%
+confidence interval half-width of --ci-metric over its seeds is at most the
+target (relative to the mean with --ci-rel), or it has --max-seeds. The CSV
+then also has n, <metric>_mean and <metric>_ci95 columns.
+
+    python3 sweep.py load --ci-target 0.05 --ci-rel --ci-metric completion_p99
+
+Finished runs are kept in the simcache.py result cache, so rerunning a sweep
+(or resuming an interrupted one, or adding one value to the grid) only
+computes the missing (point, seed) pairs.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import run_sim
+from simcache import ResultCache, DEFAULT_DIR
+from metrics import LogHistogram, QUANTILES
+
+
+BASE = {
+    "workers": 50,
+    "schedulers": 5,
+    "jobs": 300,
+    "probe": 2,
+    "mode": "batch",
+    "ndelay": 2.0,
+    "jobsize": "uniform",
+    "jobsize_max": 200,
+    "jobsize_lo": 1,
+    "jobsize_hi": 8,
+    "engine": "simpy",
+    "slots": None,          # None = unlimited
+    "arrival": "closed",
+    "load": 0.8,
+    "mmpp_burst": 10.0,
+    "mmpp_high": 0.1,
+    "trace": "",            # SPTR trace path, "" = synthetic workload
+    "steal": 0,             # peers an idle worker probes, 0 = no stealing
+    "spec": 0.0,            # speculation budget (fraction of slots), 0 = off
+    "spec_factor": 2.0,
+    "spec_progress": 0.75,
+    "rank": "count",        # probe ranking: "count" or "wait"
+    "policy": "batch",      # sampling + placement, see policies.py
+    "cluster": "homogeneous",   # worker speeds / slots, see cluster.py
+    "slow_frac": 0.5,       # two_gen
+    "slow_speed": 0.5,
+    "slow_slots": None,     # None = same as slots
+    "speed_sigma": 0.3,     # lognormal
+    "tenants": "none",      # tenant mix, see tenants.py
+    "sharing": "fifo",      # worker queue order between tenants
+    "mtbf": 0.0,            # faults (faults.py): mean ms between worker crashes
+    "mttr": 1000.0,
+    "loss": 0.0,            # message loss probability
+    "partition_every": 0.0,
+    "partition_ms": 500.0,
+    "partition_frac": 0.2,  # fraction of the workers cut off
+    "task_timeout": 500.0,  # recovery
+    "rpc_timeout": 20.0,
+    "blacklist_ms": 2000.0,
+    "net": "fixed",         # message delays, see netmodel.py
+    "net_sigma": 1.0,       # lognormal
+    "host_ms": 0.05,        # topology latencies: same host
+    "rack_ms": None,        # other rack, None = 3 x ndelay
+    "zone_ms": None,        # other zone, None = 10 x ndelay
+    "jitter": 0.0,          # topology jitter
+    "bandwidth": 0.0,       # Gbit/s per link, 0 = unlimited
+    "oversub": 1.0,
+    "task_kb": 0.0,
+    "crn": True,            # same workload in every mode for a seed (streams.py)
+}
+
+# type of the parameters that default to None (int unless listed)
+OPTIONAL = {"rack_ms": float, "zone_ms": float}
+
+MODES = ["batch", "late", "latepro"]
+
+# the three experiment groups from the ReadMe, on 1-slot workers (like
+# worker.py) so tasks queue; --set slots=none for the unlimited model
+PRESETS = {
+    "jobs": {
+        "x": "jobs",
+        "grid": {"jobs": [50, 100, 150, 200, 400, 600, 800, 1000], "mode": MODES},
+        "set": {"workers": 50, "schedulers": 5, "probe": 2, "slots": 1},
+        "out": "results.csv",
+    },
+    "probe": {
+        "x": "probe",
+        "grid": {"probe": [1, 2, 3, 4, 6, 8, 10], "mode": MODES},
+        "set": {"workers": 50, "schedulers": 5, "jobs": 300, "slots": 1},
+        "out": "results_probe.csv",
+    },
+    "workers": {
+        "x": "workers",
+        "grid": {"workers": [5, 10, 20, 40, 80], "mode": MODES},
+        "set": {"schedulers": 3, "jobs": 300, "probe": 2, "slots": 1},
+        "out": "results_workers.csv",
+    },
+    # latency vs offered load, open loop
+    "load": {
+        "x": "load",
+        "grid": {"load": [0.3, 0.5, 0.7, 0.8, 0.9, 0.95], "mode": MODES},
+        "set": {"workers": 50, "schedulers": 5, "jobs": 1000, "slots": 1,
+                "arrival": "poisson"},
+        "out": "results_load.csv",
+    },
+}
+
+METRICS = [
+    ("completion", "avg_completion"),
+    ("rpc", "avg_rpc_per_job"),
+    ("task_wait", "task_wait"),
+    ("task_resp", "task_resp"),
+    ("task_service", "task_service"),
+]
+
+# percentile columns, from histograms merged over all seeds of a point:
+# (column, run_sim hists group, job/task class, quantile)
+TAILS = ([(f"completion_{q}", "completion", "all", p) for q, p in QUANTILES]
+         + [(f"task_wait_{q}", "task_wait", "all", p) for q, p in QUANTILES]
+         + [("completion_p99_short", "completion", "short", 0.99),
+            ("completion_p99_heavy", "completion", "heavy", 0.99)])
+
+
+def merged_hist(outs, group, cls):
+    h = LogHistogram()
+    for o in outs:
+        d = o["hists"][group].get(cls)
+        if d is not None:
+            h.merge(LogHistogram.from_dict(d))
+    return h
+
+
+# ---------------------------------------------------------
+# Grid
+# ---------------------------------------------------------
+def parse_value(key, text):
+    """Convert a CLI string to the type of BASE[key]."""
+    if key not in BASE:
+        raise ValueError(f"unknown parameter: {key}")
+    if BASE[key] is None:
+        return None if text.lower() == "none" else OPTIONAL.get(key, int)(text)
+    kind = type(BASE[key])
+    return kind(float(text)) if kind is int else kind(text)
+
+
+def expand(grid, fixed):
+    """Cartesian product of grid values on top of BASE + fixed."""
+    keys = list(grid)
+    for combo in itertools.product(*(grid[k] for k in keys)):
+        point = dict(BASE)
+        point.update(fixed)
+        point.update(zip(keys, combo))
+        yield point
+
+
+def run_point(point, seed):
+    """One simulation; returns the full run_sim() output."""
+    js_params = {"max": point["jobsize_max"], "lo": point["jobsize_lo"],
+                 "hi": point["jobsize_hi"]}
+    arr_params = {"burst": point["mmpp_burst"], "high": point["mmpp_high"]}
+    out = run_sim(point["workers"], point["schedulers"], point["jobs"],
+                  point["probe"], point["ndelay"], point["mode"],
+                  point["jobsize"], js_params, seed, point["engine"], point["slots"],
+                  point["arrival"], point["load"], arr_params, point["trace"] or None,
+                  steal=point["steal"], spec=point["spec"],
+                  spec_factor=point["spec_factor"], spec_progress=point["spec_progress"],
+                  rank=point["rank"], policy=point["policy"],
+                  cluster_kind=point["cluster"],
+                  cluster_params={"slow_frac": point["slow_frac"],
+                                  "slow_speed": point["slow_speed"],
+                                  "slow_slots": point["slow_slots"],
+                                  "sigma": point["speed_sigma"]},
+                  tenant_mix=point["tenants"], sharing=point["sharing"],
+                  fault_params={k: point[k] for k in ("mtbf", "mttr", "loss", "partition_every",
+                                                      "partition_ms", "partition_frac",
+                                                      "task_timeout", "rpc_timeout",
+                                                      "blacklist_ms")},
+                  net_kind=point["net"],
+                  net_params={"sigma": point["net_sigma"], "host_ms": point["host_ms"],
+                              "rack_ms": point["rack_ms"], "zone_ms": point["zone_ms"],
+                              "jitter": point["jitter"],
+                              "bandwidth": point["bandwidth"], "oversub": point["oversub"],
+                              "task_kb": point["task_kb"]},
+                  crn=point["crn"])
+    return out
+
+
+# ---------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------
+def run_pairs(points, pairs, runs, procs=None, cache=None):
+    """Run the (point index, seed) `pairs` not in `cache` into runs[i][seed]."""
+    todo = []
+    for i, s in pairs:
+        out = cache.get(points[i], s) if cache else None
+        if out is None:
+            todo.append((i, s))
+        else:
+            runs[i][s] = out
+    print(f"{len(todo)} runs to do, {len(pairs) - len(todo)} cached", file=sys.stderr)
+
+    t0 = time.time()
+    if todo:
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            futs = {pool.submit(run_point, points[i], s): (i, s) for i, s in todo}
+            for n, fut in enumerate(as_completed(futs), 1):
+                i, seed = futs[fut]
+                out = fut.result()
+                runs[i][seed] = out
+                if cache:
+                    cache.put(points[i], seed, out)
+                print(f"[{n}/{len(todo)}] {time.time() - t0:7.1f}s  "
+                      f"{points[i]['mode']} seed={seed}", file=sys.stderr)
+
+
+def write_jsonl(path, points, runs):
+    with open(path, "w") as jl:
+        for i, p in enumerate(points):
+            for s in sorted(runs[i]):
+                out = {k: v for k, v in runs[i][s].items()
+                       if k not in ("sched_results", "hists")}
+                jl.write(json.dumps({**p, "seed": s, **out}) + "\n")
+
+
+def sweep(points, seeds, procs=None, jsonl=None, cache=None):
+    """Run every (point, seed) not in `cache`; returns [(point, [out per seed])]
+    in grid order."""
+    runs = {i: {} for i in range(len(points))}
+    run_pairs(points, [(i, s) for i in range(len(points)) for s in seeds],
+              runs, procs, cache)
+    if jsonl:
+        write_jsonl(jsonl, points, runs)
+    return [(p, [runs[i][s] for s in seeds]) for i, p in enumerate(points)]
+
+
+# ---------------------------------------------------------
+# Adaptive replication
+# ---------------------------------------------------------
+# two-sided 95% Student t quantiles for 1..30 degrees of freedom
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t95(df):
+    return T95[df - 1] if df <= len(T95) else 1.96 + 2.372 / df
+
+
+def ci95(values):
+    """(mean, half-width of the 95% confidence interval) over seeds."""
+    m = statistics.mean(values)
+    if len(values) < 2:
+        return m, math.inf
+    return m, t95(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def metric_key(name):
+    """run_sim() output key of a CSV metric name (or of a raw output key)."""
+    return dict(METRICS).get(name, name)
+
+
+def adaptive(points, metric, target, rel=False, min_seeds=3, max_seeds=50, seed=42,
+             procs=None, jsonl=None, cache=None):
+    """Add seeds to each point until the 95% CI half-width of `metric` is at
+    most `target` (a fraction of the mean if `rel`), or it has `max_seeds`.
+    Returns [(point, [out per seed])] like sweep(); n differs per point."""
+    key = metric_key(metric)
+    runs = {i: {} for i in range(len(points))}
+    want = {i: min_seeds for i in range(len(points))}
+    rnd = 0
+    while want:
+        rnd += 1
+        pairs = [(i, seed + r) for i, n in want.items()
+                 for r in range(len(runs[i]) + 1, n + 1)]
+        run_pairs(points, pairs, runs, procs, cache)
+        if rnd == 1:
+            out = runs[0][seed + 1]
+            if not isinstance(out.get(key), (int, float)):
+                raise ValueError(f"unknown metric: {metric}")
+
+        nxt = {}
+        for i in want:
+            vals = [runs[i][s][key] for s in sorted(runs[i])]
+            n = len(vals)
+            m, half = ci95(vals)
+            goal = target * abs(m) if rel else target
+            if half <= goal or n >= max_seeds:
+                continue
+            # n grows with (half / goal)^2; at most double per round
+            guess = n * (half / goal) ** 2 if goal > 0 and half < math.inf else 2 * n
+            nxt[i] = min(max_seeds, max(n + 1, min(math.ceil(guess), 2 * n)))
+        print(f"round {rnd}: {len(want) - len(nxt)} of {len(want)} points done, "
+              f"{sum(nxt.values()) - sum(len(runs[i]) for i in nxt)} runs next",
+              file=sys.stderr)
+        want = nxt
+
+    if jsonl:
+        write_jsonl(jsonl, points, runs)
+    return [(p, [runs[i][s] for s in sorted(runs[i])]) for i, p in enumerate(points)]
+
+
+def write_csv(path, x, results, extra=(), ci=None):
+    """Seed-averaged rows; other swept parameters (`extra`) go in trailing columns.
+    With `ci` (a metric name), also the seed count n and the metric's mean and
+    95% CI half-width."""
+    ci_cols = ["n", f"{ci}_mean", f"{ci}_ci95"] if ci else []
+    with open(path, "w") as f:
+        f.write(",".join([x, "mode"] + [name for name, _ in METRICS]
+                         + [name for name, _, _, _ in TAILS] + ci_cols
+                         + list(extra)) + "\n")
+        for point, outs in results:
+            row = [str(point[x]), point["mode"]]
+            for _, key in METRICS:
+                row.append(f"{statistics.mean(o[key] for o in outs):.4f}")
+            for _, group, cls, q in TAILS:
+                row.append(f"{merged_hist(outs, group, cls).quantile(q):.4f}")
+            if ci:
+                m, half = ci95([o[metric_key(ci)] for o in outs])
+                row += [str(len(outs)), f"{m:.4f}", f"{half:.4f}"]
+            row += [str(point[k]) for k in extra]
+            f.write(",".join(row) + "\n")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="parallel run_sim() parameter sweep")
+    p.add_argument("preset", nargs="?", choices=sorted(PRESETS))
+    p.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                   help="values to sweep (repeatable, overrides the preset's)")
+    p.add_argument("--set", action="append", default=[], metavar="KEY=V",
+                   help="fixed parameter (repeatable)")
+    p.add_argument("--x", help="parameter written as the first CSV column")
+    p.add_argument("--seeds", type=int, default=10, help="runs per point")
+    p.add_argument("--seed", type=int, default=42, help="runs use seed+1 .. seed+N")
+    p.add_argument("--engine", choices=["simpy", "fast"])
+    p.add_argument("--procs", type=int, default=None, help="default: all cores")
+    p.add_argument("--out", help="CSV path")
+    p.add_argument("--jsonl", help="per-run JSONL path (default: CSV path with .jsonl)")
+    p.add_argument("--ci-target", type=float, metavar="HALF",
+                   help="adaptive: add seeds per point until the 95%% CI half-width "
+                        "of --ci-metric is at most HALF (--seeds is then ignored)")
+    p.add_argument("--ci-metric", default="completion",
+                   help="CSV metric or run_sim() output key (default: completion)")
+    p.add_argument("--ci-rel", action="store_true",
+                   help="--ci-target is a fraction of the mean (0.02 = +-2%%)")
+    p.add_argument("--min-seeds", type=int, default=3)
+    p.add_argument("--max-seeds", type=int, default=50)
+    p.add_argument("--cache-dir", default=DEFAULT_DIR)
+    p.add_argument("--no-cache", action="store_true", help="recompute every run")
+    args = p.parse_args()
+
+    preset = PRESETS.get(args.preset, {"grid": {}, "set": {}})
+    grid = dict(preset["grid"])
+    fixed = dict(preset["set"])
+    for spec in args.grid:
+        key, _, vals = spec.partition("=")
+        grid[key] = [parse_value(key, v) for v in vals.split(",")]
+    for spec in args.set:
+        key, _, val = spec.partition("=")
+        fixed[key] = parse_value(key, val)
+    if args.engine:
+        fixed["engine"] = args.engine
+
+    x = args.x or preset.get("x") or next(iter(grid), None)
+    if x is None:
+        p.error("nothing to sweep: give a preset or --grid")
+    grid = {"mode": grid.pop("mode", MODES), **grid}   # mode-major rows, like the .sh output
+
+    out = args.out or preset.get("out") or f"results_{x}.csv"
+    jsonl = args.jsonl or os.path.splitext(out)[0] + ".jsonl"
+
+    points = list(expand(grid, fixed))
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    extra = [k for k in grid if k not in (x, "mode")]
+    if args.ci_target is not None:
+        if not 2 <= args.min_seeds <= args.max_seeds:
+            p.error("need 2 <= --min-seeds <= --max-seeds")
+        print(f"{len(points)} points, {args.min_seeds}..{args.max_seeds} seeds each "
+              f"on {args.procs or os.cpu_count()} procs", file=sys.stderr)
+        try:
+            results = adaptive(points, args.ci_metric, args.ci_target, args.ci_rel,
+                               args.min_seeds, args.max_seeds, args.seed, args.procs,
+                               jsonl, cache)
+        except ValueError as e:
+            p.error(str(e))
+        write_csv(out, x, results, extra, ci=args.ci_metric)
+    else:
+        seeds = [args.seed + r for r in range(1, args.seeds + 1)]
+        print(f"{len(points)} points x {len(seeds)} seeds on {args.procs or os.cpu_count()} procs",
+              file=sys.stderr)
+        results = sweep(points, seeds, args.procs, jsonl, cache)
+        write_csv(out, x, results, extra)
+    print(f"Saved to {out} (per-run: {jsonl})")
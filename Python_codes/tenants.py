@@ -0,0 +1,96 @@
+# tenants.py
+"""
+Tenants sharing the simulated cluster.
+
+Every job belongs to one tenant, drawn by the tenant's share of the jobs;
+its size comes from the tenant's own task-count range. The tag travels
+with the job's RPCs (rpc_request / rpc_assign), and each worker orders its
+queue between tenants by the --sharing discipline:
+
+    fifo     arrival order, tenants ignored (the original)
+    wfq      weighted fair sharing: start-time fair queueing with one unit
+             of cost per task, so under contention tenant t gets
+             weight_t / sum(weights) of the slots that free up
+    strict   lower priority value first, FIFO within a priority
+
+A tenant mix is "none", a built-in name from MIXES, or the path of a CSV
+file with one tenant per line:
+
+    # name,weight,priority,share,lo,hi
+    interactive,4,0,0.8,1,4
+    analytics,1,1,0.2,20,100
+
+Completion and task-wait tails are reported per tenant ("tenant <name>").
+"""
+import csv
+import random
+
+SHARING = ["fifo", "wfq", "strict"]
+
+
+class Tenant:
+    __slots__ = ("name", "weight", "priority", "share", "lo", "hi")
+
+    def __init__(self, name, weight=1.0, priority=0, share=1.0, lo=1, hi=8):
+        if weight <= 0 or share < 0 or not 1 <= lo <= hi:
+            raise ValueError(f"bad tenant {name}")
+        self.name = name
+        self.weight = weight
+        self.priority = priority
+        self.share = share
+        self.lo = lo
+        self.hi = hi
+
+    def job_size(self, rng=random):
+        return rng.randint(self.lo, self.hi)
+
+
+# short interactive jobs next to batch analytics that bring most of the work
+MIXES = {
+    "interactive_batch": [Tenant("interactive", 4.0, 0, 0.8, 1, 4),
+                          Tenant("analytics", 1.0, 1, 0.2, 20, 100)],
+}
+KINDS = ["none"] + sorted(MIXES)
+
+
+def load_tenants(path):
+    mix = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith("#") or row[0].strip() == "name":
+                continue
+            name, weight, prio, share, lo, hi = [x.strip() for x in row[:6]]
+            mix.append(Tenant(name, float(weight), int(prio), float(share), int(lo), int(hi)))
+    if not mix or sum(t.share for t in mix) == 0:
+        raise ValueError(f"{path}: no tenants")
+    return mix
+
+
+def make_tenants(kind):
+    """[Tenant] for a mix name or file, None for "none"."""
+    if kind is None or kind == "none":
+        return None
+    if kind in MIXES:
+        return MIXES[kind]
+    return load_tenants(kind)
+
+
+def pick(mix, rng=random):
+    return rng.choices(mix, weights=[t.share for t in mix])[0]
+
+
+def mean_tasks(mix):
+    total = sum(t.share for t in mix)
+    return sum(t.share * (t.lo + t.hi) / 2.0 for t in mix) / total
+
+
+def queue_key(worker, tenant, assigned_at):
+    """Heap key of a task queued on `worker` (smaller runs first)."""
+    if worker.sharing == "fifo" or tenant is None:
+        return assigned_at
+    if worker.sharing == "strict":
+        return (tenant.priority, assigned_at)
+    # wfq: start tag = max(virtual time, the tenant's last finish tag)
+    start = max(worker.vtime, worker.finish.get(tenant.name, 0.0))
+    worker.finish[tenant.name] = start + 1.0 / tenant.weight
+    return start
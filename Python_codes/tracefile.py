@@ -0,0 +1,130 @@
+# tracefile.py
+"""
+Compact binary job traces for trace-driven runs (simulation.py --trace).
+
+Layout (little endian):
+
+    header   4s  magic b"SPTR"
+             H   version (1)
+             H   reserved
+             Q   number of jobs
+             Q   number of tasks
+             d   arrival time of the last job (ms)
+    per job  d   arrival time (ms, non-decreasing)
+             I   number of tasks n (>= 1)
+             n*f task durations (ms, float32)
+
+read_trace() streams records one job at a time, so a multi-million-task
+trace never has to fit in memory. Production logs come in as CSV with one
+row per task, grouped by job:
+
+    job_id,arrival_ms,duration_ms
+
+    python3 tracefile.py convert tasks.csv jobs.sptr
+    python3 tracefile.py info jobs.sptr
+"""
+import argparse
+import csv
+import struct
+from array import array
+
+MAGIC = b"SPTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQd")
+RECORD = struct.Struct("<dI")
+
+
+class TraceWriter:
+    """Append jobs in arrival order; the header is filled in on close()."""
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0.0))
+        self.jobs = 0
+        self.tasks = 0
+        self.last = 0.0
+
+    def add(self, arrival, durations):
+        if not durations:
+            raise ValueError("a job needs at least one task")
+        if arrival < self.last:
+            raise ValueError(f"arrivals must be non-decreasing ({arrival} < {self.last})")
+        self.f.write(RECORD.pack(arrival, len(durations)))
+        self.f.write(array("f", durations).tobytes())
+        self.jobs += 1
+        self.tasks += len(durations)
+        self.last = arrival
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, VERSION, 0, self.jobs, self.tasks, self.last))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(f):
+    magic, version, _, jobs, tasks, last = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a v1 SPTR trace")
+    return {"jobs": jobs, "tasks": tasks, "last_arrival": last}
+
+
+def trace_info(path):
+    with open(path, "rb") as f:
+        return read_header(f)
+
+
+def read_trace(path):
+    """Yield (arrival_ms, [task durations]) per job, lazily."""
+    with open(path, "rb", buffering=1 << 20) as f:
+        read_header(f)
+        while True:
+            head = f.read(RECORD.size)
+            if not head:
+                return
+            arrival, n = RECORD.unpack(head)
+            durs = array("f")
+            durs.frombytes(f.read(4 * n))
+            yield arrival, durs.tolist()
+
+
+def convert_csv(csv_path, out_path):
+    """Per-task CSV (job_id,arrival_ms,duration_ms) -> binary trace."""
+    with open(csv_path, newline="") as src, TraceWriter(out_path) as w:
+        job = arrival = None
+        durs = []
+        for row in csv.reader(src):
+            if not row or row[0].startswith("#") or row[0] == "job_id":
+                continue
+            if row[0] != job:
+                if durs:
+                    w.add(arrival, durs)
+                job, arrival, durs = row[0], float(row[1]), []
+            durs.append(float(row[2]))
+        if durs:
+            w.add(arrival, durs)
+        return w.jobs, w.tasks
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="SPTR job trace tools")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="per-task CSV -> binary trace")
+    c.add_argument("csv")
+    c.add_argument("out")
+    i = sub.add_parser("info", help="print the trace header")
+    i.add_argument("trace")
+    args = p.parse_args()
+
+    if args.cmd == "convert":
+        jobs, tasks = convert_csv(args.csv, args.out)
+        print(f"{jobs} jobs, {tasks} tasks -> {args.out}")
+    else:
+        info = trace_info(args.trace)
+        print(f"jobs: {info['jobs']}  tasks: {info['tasks']}  "
+              f"last arrival: {info['last_arrival']:.3f} ms")
@@ -1,90 +1,368 @@
 # worker.py
 import simpy
-import uuid
 import random
+import heapq
+import itertools
+
+from metrics import TaskSink, size_class
+import tenants
+import netmodel
+import streams
 
 def ms(x):
     return float(x)
 
+# task service times (ms) and their probabilities
+DURATIONS = [5, 50]
+DURATION_WEIGHTS = [0.9, 0.1]
+MEAN_DURATION = sum(d * w for d, w in zip(DURATIONS, DURATION_WEIGHTS))
+_CUM_WEIGHTS = list(itertools.accumulate(DURATION_WEIGHTS))
+
+# weight of the newest observation in a worker's duration estimates
+EWMA_ALPHA = 0.2
+
+def sample_duration(rng=random):
+    # 90% short (5 ms), 10% long (50 ms)
+    return rng.choices(DURATIONS, cum_weights=_CUM_WEIGHTS)[0]
+
+def parse_probe(rep):
+    """"Q <tasks> <expected wait ms> <load>" -> (tasks, wait, load)."""
+    try:
+        parts = rep.split()
+        q = int(parts[1])
+    except Exception:
+        return 0, 0.0, 0.0
+    wait = float(parts[2]) if len(parts) > 2 else 0.0
+    load = float(parts[3]) if len(parts) > 3 else float(q)
+    return q, wait, load
+
 class Worker:
     """
     Worker provides:
-    - handle_probe() -> "Q <queue_len>"
-    - handle_request(jobid, tid, sched) -> "RID <rid>"
-    - handle_assign(jobid, tid, sched) -> "OK"
-    - handle_assign_rid(rid) -> "OK" or "ERR"
+    - handle_probe() -> "Q <queue_len> <expected wait ms> <load>"
+    - handle_request(jobid, tid, sched, tenant=None) -> "RID <rid>"
+    - handle_assign(jobid, tid, sched, dur=None, tenant=None) -> "OK"
+    - handle_assign_rid(rid, dur=None, tid=None) -> "OK" or "ERR"
     - handle_cancel(rid) -> "CANCELLED"
+    - handle_kill(jobid, tid) -> "DROPPED 0", "KILLED <ms run>" or "NONE"
+    - handle_status(jobid, tid) -> "RUNNING", "QUEUED" or "NONE"
+    - handle_steal_probe() / handle_steal()   (worker-to-worker, see below)
+    dur, when given (trace replay), replaces the sampled task duration.
+    tenant is the job's tenants.Tenant, None without tenants. tid, when
+    given, is the task a reservation is bound to (default: the requested one).
+
+    A worker runs a task of d ms in d / speed ms (cluster.py). load in a
+    probe reply is queue_len per unit of capacity, (slots or 1) * speed.
+
+    The expected wait in a probe reply is estimated work ahead of a new task
+    per slot (0 while a slot is free). Workers do not know task durations in
+    advance: each one keeps an EWMA of the durations it observed per job
+    size class (metrics.size_class) and charges queued and running tasks
+    with their class estimate.
+
+    With slots=None every bound task starts at once (the original model).
+    With slots=k at most k tasks run; the rest wait in a FIFO ordered by the
+    time they reached the worker, so a bound reservation keeps the place it
+    got when it was requested. Unbound reservations never hold a slot.
+    With tenants, sharing="wfq" / "strict" orders the queue between tenants
+    instead (tenants.queue_key); each tenant's own tasks stay FIFO.
+
+    Work stealing (steal=k, needs slots): whenever a slot frees up and
+    nothing is queued, the worker probes k random peers and takes the half
+    of the longest queue that would run last, bound reservations included.
+    The stolen entries keep their original arrival time.
+
+    Faults (faults.py): crash() loses everything the worker holds, restart()
+    brings it back empty; DONE messages can be lost on the way.
     """
-    def __init__(self, env, wid, net_delay):
+    def __init__(self, env, wid, net_delay, slots=None, metrics=None, speed=1.0, seed=None):
         self.env = env
         self.id = wid
-        self.net = net_delay
+        self.rng = streams.Stream(seed, streams.WORKER, wid)
+        self.network = netmodel.Network(net_delay)   # replaced by run_sim
+        self.host = wid
+        self.rack = None         # set by a topology network (policies.rack_of)
+        self.slots = slots
+        self.speed = speed
+        self.capacity = (slots or 1) * speed
 
         self.running = 0
-        self.reservations = {}   # rid -> (jobid, tid, dur, sched, assigned_at)
+        self.reservations = {}   # rid -> (jobid, tid, dur, sched, assigned_at, tenant)
+        self.queue = []          # heap: (key, seq, jobid, tid, dur, sched, assigned_at, tenant)
+        self.seq = 0
+        self.rid_seq = 0
+
+        # queue order between tenants (tenants.py), set up by run_sim
+        self.sharing = "fifo"
+        self.vtime = 0.0         # wfq: start tag of the last task started
+        self.finish = {}         # wfq: tenant name -> finish tag of its last task
+
+        # work stealing, set up by run_sim
+        self.peers = []
+        self.steal = 0           # peers probed when idle, 0 = off
+        self.stealing = False
+        self.steal_probes = 0
+        self.steal_rpcs = 0
+        self.stolen = 0
+
+        # speculation (speculation.py): running tasks can be killed
+        self.killable = False
+        self.procs = {}          # (jobid, tid) -> (exec process, start)
+
+        # faults (faults.py), set up by run_sim
+        self.faults = None
+        self.up = True
+
+        # duration estimates
+        self.est = {}            # job size class -> EWMA of observed durations (ms)
+        self.est_short = {}      # job size class -> EWMA of durations <= est
+        self.est_long = {}       # job size class -> EWMA of durations > est
+        self.active = {}         # (jobid, tid) -> (start, class, estimate), running tasks
 
         # metrics
+        self.work = 0.0          # ms of task work done (at speed 1)
         self.busy_time = 0.0
-        self.task_metrics = []   # dicts: {jobid, tid, duration, start, end, wait, response}
+        self.metrics = metrics if metrics is not None else TaskSink()   # shared by run_sim
 
     def sample_duration(self):
-        # 90% short (30 ms), 10% long (400 ms)
-        return random.choices([5, 50], weights=[0.9, 0.1])[0]
+        return sample_duration(self.rng)
 
     def handle_probe(self):
-        # The reported queue length is running + reserved
-        return f"Q {self.running + len(self.reservations)}"
+        # The reported queue length is running + waiting + reserved
+        q = self.running + len(self.queue) + len(self.reservations)
+        return f"Q {q} {self.expected_wait():.3f} {q / self.capacity}"
 
-    def handle_request(self, jobid, tid, sched):
-        rid = uuid.uuid4().hex[:8]
+    def handle_request(self, jobid, tid, sched, tenant=None):
+        self.rid_seq += 1
+        rid = f"{self.id}.{self.rid_seq}"
         dur = self.sample_duration()
-        self.reservations[rid] = (jobid, tid, dur, sched, self.env.now)
+        self.reservations[rid] = (jobid, tid, dur, sched, self.env.now, tenant)
         return f"RID {rid}"
 
-    def handle_assign(self, jobid, tid, sched):
-        dur = self.sample_duration()
-        assigned_at = self.env.now
-        self.running += 1
-        # start execution
-        self.env.process(self._exec(jobid, tid, dur, sched, assigned_at))
+    def handle_assign(self, jobid, tid, sched, dur=None, tenant=None):
+        if dur is None:
+            dur = self.sample_duration()
+        self._enqueue(jobid, tid, dur, sched, self.env.now, tenant)
         return "OK"
 
-    def handle_assign_rid(self, rid):
+    def handle_assign_rid(self, rid, dur=None, tid=None):
         if rid not in self.reservations:
             return "ERR"
-        jobid, tid, dur, sched, assigned_at = self.reservations.pop(rid)
-        self.running += 1
-        self.env.process(self._exec(jobid, tid, dur, sched, assigned_at))
+        jobid, requested, sampled, sched, assigned_at, tenant = self.reservations.pop(rid)
+        if dur is None:
+            dur = sampled
+        if tid is None:
+            tid = requested
+        self._enqueue(jobid, tid, dur, sched, assigned_at, tenant)
         return "OK"
 
     def handle_cancel(self, rid):
         self.reservations.pop(rid, None)
         return "CANCELLED"
 
-    def _exec(self, jobid, tid, dur, sched, assigned_at):
+    def handle_kill(self, jobid, tid):
+        """Stop the losing copy of a speculated task."""
+        for i, e in enumerate(self.queue):
+            if e[2] == jobid and e[3] == tid:
+                self.queue[i] = self.queue[-1]
+                self.queue.pop()
+                heapq.heapify(self.queue)
+                return "DROPPED 0"
+        run = self.procs.pop((jobid, tid), None)
+        if run is None:
+            return "NONE"
+        proc, start = run
+        proc.interrupt()
+        return f"KILLED {self.env.now - start}"
+
+    def handle_status(self, jobid, tid):
+        if (jobid, tid) in self.active:
+            return "RUNNING"
+        if any(e[2] == jobid and e[3] == tid for e in self.queue):
+            return "QUEUED"
+        return "NONE"
+
+    def handle_steal_probe(self):
+        return len(self.queue)
+
+    def handle_steal(self):
+        """Give away the half of the queue that would run last (rounded up)."""
+        n = (len(self.queue) + 1) // 2
+        if n == 0:
+            return []
+        entries = sorted(self.queue)
+        self.queue = entries[:-n]     # a sorted list is still a heap
+        return entries[-n:]
+
+    # ---------------------------------------------------------
+    # Duration estimates
+    # ---------------------------------------------------------
+    @staticmethod
+    def task_class(jobid, sched):
+        # the job's size travels with its tasks; the simulator reads it off the scheduler
+        info = sched.jobinfo.get(jobid)
+        return size_class(info["tasks"]) if info else None
+
+    def estimate(self, cls):
+        return self.est.get(cls, MEAN_DURATION)
+
+    def observe(self, cls, dur):
+        e = self.estimate(cls)
+        self.est[cls] = e + EWMA_ALPHA * (dur - e)
+        side = self.est_long if dur > e else self.est_short
+        x = side.get(cls, dur)
+        side[cls] = x + EWMA_ALPHA * (dur - x)
+
+    def remaining(self, cls, est, ran):
+        """Expected ms left of a task of class `cls` that has run `ran` ms."""
+        # durations split at the class mean into a short and a long mode
+        if ran < self.est_short.get(cls, est):
+            return max(est - ran, 0.0)
+        # it outlived the short ones: it is one of the long ones
+        longer = self.est_long.get(cls, 2 * est)
+        if ran < longer:
+            return longer - ran
+        return ran     # past even that: assume it is half done
+
+    def expected_wait(self):
+        """Estimated ms until a newly assigned task gets a slot."""
+        if self.slots is None or self.running < self.slots:
+            return 0.0
+        now = self.env.now
+        work = 0.0
+        for start, cls, est in self.active.values():
+            work += self.remaining(cls, est, now - start)
+        for e in self.queue:
+            work += self.estimate(self.task_class(e[2], e[5]))
+        return work / self.slots
+
+    # ---------------------------------------------------------
+    # Slots
+    # ---------------------------------------------------------
+    def _enqueue(self, jobid, tid, dur, sched, assigned_at, tenant=None):
+        if self.slots is None or self.running < self.slots:
+            self._start(jobid, tid, dur, sched, assigned_at, tenant)
+        else:
+            key = tenants.queue_key(self, tenant, assigned_at)
+            heapq.heappush(self.queue, (key, self.seq, jobid, tid, dur, sched, assigned_at, tenant))
+            self.seq += 1
+
+    def _start(self, jobid, tid, dur, sched, assigned_at, tenant=None):
+        self.running += 1
+        self.env.process(self._exec(jobid, tid, dur, sched, assigned_at, tenant))
+
+    def _release(self):
+        """A task finished: free its slot and start the earliest waiting one."""
+        self.running -= 1
+        if self.queue:
+            key, _, jobid, tid, dur, sched, assigned_at, tenant = heapq.heappop(self.queue)
+            if self.sharing == "wfq":
+                self.vtime = key
+            self._start(jobid, tid, dur, sched, assigned_at, tenant)
+        elif self.steal and not self.stealing and self.up:
+            self.stealing = True
+            self.env.process(self._steal())
+
+    # ---------------------------------------------------------
+    # Faults
+    # ---------------------------------------------------------
+    def crash(self):
+        """Drop every running, queued and reserved task; returns how many
+        tasks (running or queued) went down."""
+        lost = len(self.procs) + len(self.queue)
+        self.up = False
+        self.queue = []
+        self.reservations = {}
+        for proc, _ in self.procs.values():
+            proc.interrupt()
+        self.procs = {}
+        return lost
+
+    def restart(self):
+        """Back up with an empty queue and no duration history."""
+        self.up = True
+        self.est, self.est_short, self.est_long = {}, {}, {}
+        self.vtime = 0.0
+        self.finish = {}
+
+    # ---------------------------------------------------------
+    # Work stealing
+    # ---------------------------------------------------------
+    def _steal_peers(self):
+        peers = self.rng.sample(self.peers, min(len(self.peers), self.steal + 1))
+        return [w for w in peers if w is not self][:self.steal]
+
+    @staticmethod
+    def _pick_victim(peers, qlens):
+        best = None
+        for w, q in zip(peers, qlens):
+            if q > 0 and (best is None or q > best[1]):
+                best = (w, q)
+        return best[0] if best else None
+
+    def _take(self, entries):
+        if not self.up:
+            return               # crashed while stealing: the entries are lost
+        self.stolen += len(entries)
+        for _, _, jobid, tid, dur, sched, assigned_at, tenant in entries:
+            self._enqueue(jobid, tid, dur, sched, assigned_at, tenant)
+
+    def _peer_rpc(self, w, handler):
+        yield self.env.timeout(ms(self.network.delay(self, w)))
+        rep = handler()
+        yield self.env.timeout(ms(self.network.delay(w, self, self._steal_bytes(rep))))
+        return rep
+
+    def _steal_bytes(self, rep):
+        # a steal reply carries the stolen tasks, a steal probe just a count
+        return len(rep) * self.network.task_bytes if isinstance(rep, list) else 0
+
+    def _steal(self):
+        peers = self._steal_peers()
+        self.steal_probes += len(peers)
+        probes = [self.env.process(self._peer_rpc(w, w.handle_steal_probe)) for w in peers]
+        res = yield simpy.AllOf(self.env, probes)
+        victim = self._pick_victim(peers, list(res.values()))
+        if victim is not None:
+            self.steal_rpcs += 1
+            entries = yield self.env.process(self._peer_rpc(victim, victim.handle_steal))
+            self._take(entries)
+        self.stealing = False
+
+    def _exec(self, jobid, tid, dur, sched, assigned_at, tenant=None):
         start = self.env.now
         wait_time = start - assigned_at
-        yield self.env.timeout(ms(dur))
+        cls = self.task_class(jobid, sched)
+        self.active[(jobid, tid)] = (start, cls, self.estimate(cls))
+        if self.killable:
+            self.procs[(jobid, tid)] = (self.env.active_process, start)
+        try:
+            yield self.env.timeout(ms(dur / self.speed))
+        except simpy.Interrupt:
+            # killed by handle_kill or a crash: give the slot back, report nothing
+            self.active.pop((jobid, tid), None)
+            self.busy_time += self.env.now - start
+            self._release()
+            return
         end = self.env.now
+        self.active.pop((jobid, tid), None)
+        self.observe(cls, end - start)
+        if self.killable:
+            self.procs.pop((jobid, tid), None)
 
         # update worker state and metrics
-        self.running -= 1
+        self._release()
         self.busy_time += (end - start)
-        self.task_metrics.append({
-            "jobid": jobid,
-            "tid": tid,
-            "duration": dur,
-            "start": start,
-            "end": end,
-            "wait": wait_time,
-            "response": end - assigned_at
-        })
+        self.work += dur
+        self.metrics.task(jobid, tid, dur, start, end, wait_time, end - assigned_at, tenant)
 
         # simulate network delay before notifying scheduler
-        yield self.env.timeout(ms(self.net))
+        yield self.env.timeout(ms(self.network.delay(self, sched)))
+        if self.faults is not None and not self.faults.deliver(self):
+            return               # DONE lost
         # notify scheduler the task is done
         try:
-            sched.notify_done(jobid, tid)
+            sched.notify_done(jobid, tid, self)
         except Exception:
             # scheduler might not exist or notify_done may differ
             pass
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: event-loop worker.py vs thread-per-task worker_threaded.py.
+
+For each worker implementation (started on the same box) it measures
+  - RPC/s       : PROBE round trips over --conns pipelined connections
+                  with --inflight requests outstanding on each
+  - dispatch/s  : --tasks zero-length ASSIGNs, from first send until the
+                  last DONE reaches the benchmark's own DONE listener
+
+Usage: python3 bench_worker.py [--seconds 3] [--conns 8] [--inflight 16] [--tasks 5000]
+"""
+import asyncio, subprocess, sys, time, argparse
+from rpc_pool import AsyncPooledConnection
+
+PORT = 9700
+DONE_PORT = 9200
+
+
+############################################################
+# DONE COUNTER
+############################################################
+class DoneCounter:
+    def __init__(self):
+        self.count = 0
+        self.target = None
+        self.finished = None
+
+    async def handler(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.startswith(b"DONE"):
+                    # "DONE j t" or batched "DONE j t w [j t w ...]"
+                    n = len(line.split()) - 1
+                    self.count += 1 if n == 2 else n // 3
+                    if self.target is not None and self.count >= self.target:
+                        self.finished.set()
+        except (ConnectionError, asyncio.CancelledError):
+            pass    # worker killed / benchmark shutting down
+        writer.close()
+
+
+############################################################
+# MEASUREMENTS
+############################################################
+async def measure_rpc(conns, inflight, seconds):
+    done = 0
+    stop = time.perf_counter() + seconds
+
+    async def client(conn):
+        nonlocal done
+        while time.perf_counter() < stop:
+            ok, _ = await conn.call("PROBE", timeout=5.0)
+            done += ok
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in conns for _ in range(inflight)])
+    return done / (time.perf_counter() - t0)
+
+
+async def measure_dispatch(conns, counter, ntasks):
+    counter.count = 0
+    counter.target = ntasks
+    counter.finished = asyncio.Event()
+
+    async def sender(conn, ids):
+        for i in ids:
+            await conn.call(f"ASSIGN BENCH T{i} 0 127.0.0.1", timeout=5.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[sender(c, range(k, ntasks, len(conns)))
+                           for k, c in enumerate(conns)])
+    try:
+        await asyncio.wait_for(counter.finished.wait(), 60)
+    except asyncio.TimeoutError:
+        pass
+    return counter.count / (time.perf_counter() - t0)
+
+
+async def bench(script, args, counter):
+    proc = subprocess.Popen([sys.executable, script, str(PORT)],
+                            stdout=subprocess.DEVNULL)
+    try:
+        await asyncio.sleep(0.8)
+        conns = [await AsyncPooledConnection.open("127.0.0.1", PORT)
+                 for _ in range(args.conns)]
+        rps = await measure_rpc(conns, args.inflight, args.seconds)
+        dps = await measure_dispatch(conns, counter, args.tasks)
+        for c in conns:
+            c.close()
+        return rps, dps
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+async def main(args):
+    counter = DoneCounter()
+    server = await asyncio.start_server(counter.handler, "0.0.0.0", DONE_PORT,
+                                        reuse_address=True, backlog=1024)
+    rows = []
+    async with server:
+        for script in ("worker_threaded.py", "worker.py"):
+            rows.append((script, *await bench(script, args, counter)))
+
+    print(f"\n{'worker':<22}{'RPC/s':>12}{'dispatch/s':>14}")
+    for script, rps, dps in rows:
+        print(f"{script:<22}{rps:>12.0f}{dps:>14.0f}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--conns", type=int, default=8)
+    p.add_argument("--inflight", type=int, default=16)
+    p.add_argument("--tasks", type=int, default=5000)
+    asyncio.run(main(p.parse_args()))
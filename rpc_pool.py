@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Persistent, pipelined RPC connections shared by scheduler.py and worker.py.
+
+Every frame is one newline-terminated text line. A pipelined request carries
+a request id as its first token, prefixed with '#', and the reply echoes it:
+
+    "#17 PROBE\n"   ->   "#17 Q 3\n"
+
+so many requests can be in flight on one connection and replies can be
+matched out of order. Lines without an id are legacy one-shot requests and
+are answered without one.
+"""
+import socket, threading, itertools, asyncio
+
+
+############################################################
+# FRAMING
+############################################################
+def encode(rid, message):
+    """Build one wire frame; rid=None produces a legacy frame."""
+    if rid is None:
+        return (message + "\n").encode()
+    return f"#{rid} {message}\n".encode()
+
+
+def decode(line):
+    """Split one frame (without newline) into (rid or None, message)."""
+    if line.startswith("#"):
+        head, _, rest = line.partition(" ")
+        try:
+            return int(head[1:]), rest.strip()
+        except ValueError:
+            pass
+    return None, line.strip()
+
+
+def read_lines(conn, bufsize=65536):
+    """Yield decoded text lines from a blocking socket until EOF."""
+    buf = b""
+    while True:
+        chunk = conn.recv(bufsize)
+        if not chunk:
+            return
+        buf += chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            yield line.decode()
+
+
+############################################################
+# CLIENT SIDE
+############################################################
+class PooledConnection:
+    """One long-lived connection to a peer with many requests in flight."""
+
+    def __init__(self, ip, port, timeout=1.0):
+        self.addr = (ip, port)
+        self.sock = socket.create_connection(self.addr, timeout=timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.ids = itertools.count(1)
+        self.pending = {}          # rid -> [Event, reply]
+        self.send_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.alive = True
+
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    def _reader(self):
+        try:
+            for line in read_lines(self.sock):
+                rid, reply = decode(line)
+                with self.lock:
+                    slot = self.pending.pop(rid, None)
+                if slot is not None:
+                    slot[1] = reply
+                    slot[0].set()
+        except OSError:
+            pass
+        self.close()
+
+    def call(self, message, timeout=1.0):
+        """Send one request and block until its reply; returns (ok, reply)."""
+        rid = next(self.ids)
+        slot = [threading.Event(), None]
+        with self.lock:
+            if not self.alive:
+                return False, ""
+            self.pending[rid] = slot
+
+        try:
+            with self.send_lock:
+                self.sock.sendall(encode(rid, message))
+        except OSError:
+            self.close()
+            return False, ""
+
+        if not slot[0].wait(timeout) or slot[1] is None:
+            with self.lock:
+                self.pending.pop(rid, None)
+            return False, ""
+        return True, slot[1]
+
+    def close(self):
+        with self.lock:
+            self.alive = False
+            pending, self.pending = self.pending, {}
+        for slot in pending.values():
+            slot[0].set()          # wake waiters; reply stays None
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ConnectionPool:
+    """Lazily opens one PooledConnection per (ip, port) and reuses it."""
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+        self.conns = {}
+        self.lock = threading.Lock()
+
+    def get(self, ip, port):
+        key = (ip, port)
+        with self.lock:
+            conn = self.conns.get(key)
+            if conn is None or not conn.alive:
+                conn = PooledConnection(ip, port, self.timeout)
+                self.conns[key] = conn
+            return conn
+
+    def call(self, ip, port, message, timeout=None):
+        try:
+            conn = self.get(ip, port)
+        except OSError:
+            return False, ""
+        return conn.call(message, self.timeout if timeout is None else timeout)
+
+    def close(self):
+        with self.lock:
+            conns, self.conns = list(self.conns.values()), {}
+        for conn in conns:
+            conn.close()
+
+
+############################################################
+# ASYNCIO CLIENT SIDE
+############################################################
+class AsyncPooledConnection:
+    """asyncio twin of PooledConnection: many in-flight requests per stream."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.pending = {}          # rid -> Future(reply)
+        self.alive = True
+        self.reader_task = asyncio.get_running_loop().create_task(self._reader_loop())
+
+    @classmethod
+    async def open(cls, ip, port, timeout=1.0):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, port), timeout)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer)
+
+    async def _reader_loop(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                rid, reply = decode(line.decode())
+                fut = self.pending.pop(rid, None)
+                if fut is not None and not fut.done():
+                    fut.set_result(reply)
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        self.close()
+
+    async def call(self, message, timeout=1.0):
+        """Send one request and await its reply; returns (ok, reply)."""
+        if not self.alive:
+            return False, ""
+        rid = next(self.ids)
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[rid] = fut
+        try:
+            self.writer.write(encode(rid, message))
+            reply = await asyncio.wait_for(fut, timeout)
+        except (OSError, asyncio.TimeoutError):
+            self.pending.pop(rid, None)
+            return False, ""
+        return reply is not None, reply or ""
+
+    def send(self, message):
+        """Fire-and-forget frame (no id, no reply expected)."""
+        if not self.alive:
+            return False
+        try:
+            self.writer.write(encode(None, message))
+        except (OSError, RuntimeError):
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        self.alive = False
+        pending, self.pending = self.pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_result(None)
+        try:
+            self.writer.close()
+        except (OSError, RuntimeError):
+            pass
+
+
+class AsyncConnectionPool:
+    """One AsyncPooledConnection per (ip, port), opened on first use."""
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+        self.conns = {}
+        self.opening = {}          # (ip, port) -> Task opening the connection
+
+    async def get(self, ip, port):
+        key = (ip, port)
+        conn = self.conns.get(key)
+        if conn is not None and conn.alive:
+            return conn
+        task = self.opening.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(
+                AsyncPooledConnection.open(ip, port, self.timeout))
+            self.opening[key] = task
+        try:
+            conn = await asyncio.shield(task)
+        finally:
+            if self.opening.get(key) is task and task.done():
+                del self.opening[key]
+        self.conns[key] = conn
+        return conn
+
+    async def call(self, ip, port, message, timeout=None):
+        try:
+            conn = await self.get(ip, port)
+        except (OSError, asyncio.TimeoutError):
+            return False, ""
+        return await conn.call(message, self.timeout if timeout is None else timeout)
+
+    async def send(self, ip, port, message):
+        try:
+            conn = await self.get(ip, port)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        return conn.send(message)
+
+    def close(self):
+        conns, self.conns = list(self.conns.values()), {}
+        for conn in conns:
+            conn.close()
@@ -1,46 +1,227 @@
 #!/usr/bin/env python3
-import socket, threading, time, random, argparse
-from statistics import mean
+import socket, threading, time, random, argparse, asyncio
+from collections import deque
+from statistics import mean, quantiles
+from rpc_pool import ConnectionPool, AsyncConnectionPool, encode, decode
 
 ############################################################
 # GLOBALS
 ############################################################
 
-done_events = {}      # (jobid, taskid) -> Event
-lock = threading.Lock()
 MY_IP = "127.0.0.1"   # scheduler IP (used for DONE callbacks)
 
+POOL = ConnectionPool(timeout=1.0)   # persistent per-worker connections
+USE_POOL = True
+rpc_latencies = []    # ms per RPC, filled by rpc()
+
+TASK_TIMEOUT = 10.0   # --task-timeout: s without all DONEs before the job's
+                      # pending tasks are placed again (None = wait forever)
+BLACKLIST_S = 5.0     # --blacklist: s a worker that failed an RPC is not sampled
+blacklist = {}        # (ip, port) -> time.time() it may be sampled again
+SETTLE_S = 5.0        # wait at most this long for the last GETTASKs (no --task-timeout)
+
 ############################################################
-# DONE LISTENER THREAD
+# PER-JOB COMPLETION TRACKING
 ############################################################
-def listen_done(port=9200):
-    """Scheduler listens for DONE messages from workers."""
-    s = socket.socket()
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind(("0.0.0.0", port))
-    s.listen(200)
-    print("[scheduler] Listening for DONE on port 9200")
-
-    while True:
-        conn, addr = s.accept()
-        data = conn.recv(4096).decode().strip().split()
-        conn.close()
-
-        if not data:
-            continue
+class JobTracker:
+    """Jobs in flight, completed from the DONE listener thread.
+
+    open() registers a job with a callback, expect() lists the task ids it
+    will wait for (before any of them is assigned), and the job's end time is
+    stamped when the last expected DONE arrives.
+
+    For late binding the job's tasks are handed to open() unlaunched; take()
+    gives them out one by one as workers call back with GETTASK.
+
+    GETTASKs are counted tracker-wide (`pulls`, `noops`), not per job: a
+    reservation often reaches its slot after the job has finished and been
+    closed, and its NOOP pull still cost an RPC. reserve() / resolve() keep
+    the reservations no GETTASK or CANCEL has settled yet, so a run can wait
+    for them (settle()) before reading the counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}    # jobid -> {"pending": set, "end": float, "on_done": fn, ...}
+        self.pulls = 0    # GETTASKs received
+        self.noops = 0    # ... answered with NOOP
+        self.unsettled = set()   # rids reserved, not pulled or cancelled yet
+        self.early = set()       # rids pulled / cancelled before reserve() saw them
+
+    def open(self, jobid, on_done, tasks=(), on_launched=None):
+        """tasks: [(taskid, dur)] launched later through take(); on_launched
+        fires once the last of them has been handed out."""
+        with self.lock:
+            self.jobs[jobid] = {"pending": {taskid for (taskid, _) in tasks},
+                                "end": None, "waits": [], "on_done": on_done,
+                                "unlaunched": deque(tasks), "used": set(),
+                                "on_launched": on_launched}
+
+    def expect(self, jobid, taskids):
+        with self.lock:
+            self.jobs[jobid]["pending"].update(taskids)
+
+    def task_done(self, jobid, taskid, wait=None):
+        """Returns False for a DONE nobody is waiting for. `wait` is the
+        worker-side queue wait of the task in ms, if reported."""
+        with self.lock:
+            job = self.jobs.get(jobid)
+            if job is None or taskid not in job["pending"]:
+                return False
+            job["pending"].discard(taskid)
+            if wait is not None:
+                job["waits"].append(wait)
+            if job["pending"]:
+                return True
+            job["end"] = time.time()
+            on_done = job["on_done"]
+        on_done()
+        return True
+
+    def take(self, jobid, rid=None):
+        """Next unlaunched (taskid, dur) of a job, or None once all tasks
+        are launched. `rid` is the reservation the task is bound to."""
+        with self.lock:
+            if rid is not None:            # a worker's GETTASK
+                self.pulls += 1
+                self._resolve(rid)
+            job = self.jobs.get(jobid)
+            if job is None or not job["unlaunched"]:
+                if rid is not None:
+                    self.noops += 1
+                return None
+            task = job["unlaunched"].popleft()
+            if rid is not None:
+                job["used"].add(rid)
+            on_launched = None if job["unlaunched"] else job["on_launched"]
+        if on_launched is not None:
+            on_launched()
+        return task
+
+    def overdue(self, jobid):
+        """Task ids of a job without a DONE yet. Its unlaunched tasks count as
+        launched from here on, so late GETTASKs get NOOP."""
+        with self.lock:
+            job = self.jobs.get(jobid)
+            if job is None:
+                return []
+            on_launched = job["on_launched"] if job["unlaunched"] else None
+            job["unlaunched"].clear()
+            pending = sorted(job["pending"])
+        if on_launched is not None:
+            on_launched()
+        return pending
+
+    def all_launched(self, jobid):
+        with self.lock:
+            job = self.jobs.get(jobid)
+            return job is None or not job["unlaunched"]
+
+    def used(self, jobid):
+        """Reservation ids that were bound to a task so far."""
+        with self.lock:
+            return set(self.jobs[jobid]["used"])
+
+    def close(self, jobid):
+        """Forget a finished job; returns its record ("end", "waits")."""
+        with self.lock:
+            return self.jobs.pop(jobid)
+
+    def reserve(self, rid):
+        """A REQUEST got reservation `rid`."""
+        with self.lock:
+            if rid in self.early:
+                self.early.discard(rid)
+            else:
+                self.unsettled.add(rid)
 
-        if data[0] == "DONE":
-            jobid = data[1]
-            taskid = data[2]
+    def resolve(self, rid):
+        """Reservation `rid` was cancelled."""
+        with self.lock:
+            self._resolve(rid)
 
-            # Find event safely
-            with lock:
-                evt = done_events.get((jobid, taskid))
+    def _resolve(self, rid):
+        if rid in self.unsettled:
+            self.unsettled.discard(rid)
+        else:
+            self.early.add(rid)
 
-            if evt is not None:
-                evt.set()
-            else:
+    def settle(self, timeout):
+        """Wait up to `timeout` s (None = forever) for every reservation to be
+        pulled or cancelled; lost ones (crashed worker) never are."""
+        end = None if timeout is None else time.time() + timeout
+        while self.unsettled and (end is None or time.time() < end):
+            time.sleep(0.01)
+
+
+tracker = JobTracker()
+
+############################################################
+# WORKER CALLBACK LISTENER (DONE / GETTASK)
+############################################################
+def listen_done(port=9200):
+    """Scheduler listens for worker callbacks: (batched) DONE when tasks
+    finished and GETTASK when one of its reservations reached a free slot.
+    Runs its own asyncio loop, so call it in a dedicated thread."""
+    asyncio.run(serve_callbacks(port))
+
+
+async def serve_callbacks(port):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(CallbackProtocol, "0.0.0.0", port,
+                                      reuse_address=True, backlog=1024)
+    print("[scheduler] Listening for DONE/GETTASK on port 9200")
+    async with server:
+        await server.serve_forever()
+
+
+class CallbackProtocol(asyncio.Protocol):
+    """One worker connection (one-shot or persistent). All frames in a chunk
+    are handled in one pass and their replies written together."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buf = b""
+
+    def data_received(self, data):
+        lines = (self.buf + data).split(b"\n")
+        self.buf = lines.pop()
+
+        out = []
+        for line in lines:
+            rid, text = decode(line.decode())
+            data = text.split()
+            if not data:
+                continue
+            try:
+                reply = handle_callback(data)
+            except (IndexError, ValueError):
+                reply = "ERR"
+            if reply is not None:
+                out.append(encode(rid, reply))
+        if out:
+            self.transport.write(b"".join(out))
+
+
+def handle_callback(data):
+    if data[0] == "DONE":
+        # "DONE <jobid> <taskid>" or batches of "<jobid> <taskid> <wait_ms>"
+        fields = data[1:]
+        entries = [fields + [None]] if len(fields) == 2 else \
+                  [fields[i:i+3] for i in range(0, len(fields) - 2, 3)]
+        for jobid, taskid, wait in entries:
+            wait = float(wait) if wait is not None else None
+            # a re-placed task (--task-timeout) may legitimately report twice
+            if not tracker.task_done(jobid, taskid, wait) and TASK_TIMEOUT is None:
                 print(f"[scheduler] WARNING: DONE for unknown ({jobid}, {taskid})")
+        return None
+
+    if data[0] == "GETTASK":
+        # late binding: hand out the job's next unlaunched task, if any
+        task = tracker.take(data[1], data[2])
+        return "NOOP" if task is None else f"TASK {task[0]} {task[1]}"
+
+    return "ERR"
 
 
 ############################################################
@@ -48,6 +229,17 @@ def listen_done(port=9200):
 ############################################################
 def rpc(ip, port, message):
     """Send a blocking RPC; returns (ok, reply_string)."""
+    t0 = time.perf_counter()
+    if USE_POOL:
+        ok, reply = POOL.call(ip, port, message)
+    else:
+        ok, reply = rpc_oneshot(ip, port, message)
+    rpc_latencies.append((time.perf_counter() - t0) * 1000)
+    return ok, reply
+
+
+def rpc_oneshot(ip, port, message):
+    """Legacy path: one TCP connection per RPC (kept for comparison)."""
     try:
         s = socket.socket()
         s.settimeout(1.0)
@@ -61,116 +253,539 @@ def rpc(ip, port, message):
 
 
 ############################################################
-# MAIN SCHEDULER LOGIC
+# DEAD WORKERS
 ############################################################
-def run_scheduler(workers, mode="batch", jobs=100, m=3, d=2):
+def mark_dead(w):
+    """`w` did not answer: leave it out of samples for BLACKLIST_S."""
+    blacklist[w] = time.time() + BLACKLIST_S
+
+
+def sample_workers(workers, n):
+    """n random workers, skipping blacklisted ones while others are left."""
+    now = time.time()
+    alive = [w for w in workers if blacklist.get(w, 0.0) <= now] or workers
+    return random.sample(alive, min(n, len(alive)))
+
+
+def probe_loads(sample):
+    """PROBE every worker of `sample`; (queue length, worker) of those that
+    answered. The others are blacklisted rather than ranked last."""
+    loads = []
+    for (ip, port) in sample:
+        ok, rep = rpc(ip, port, "PROBE")
+        if ok and rep.startswith("Q"):
+            loads.append((int(rep.split()[1]), (ip, port)))
+        else:
+            mark_dead((ip, port))
+    return loads
+
+
+def replace_tasks(workers, jobid, d, dur, taskids):
+    """Place overdue tasks again, each on the least loaded of d fresh
+    probes; returns the RPC count. Whichever copy reports first counts."""
+    rpc_count = 0
+    for taskid in taskids:
+        sample = sample_workers(workers, d)
+        loads = probe_loads(sample)
+        rpc_count += len(sample)
+        ip, port = min(loads)[1] if loads else random.choice(sample)
+        ok, _ = rpc(ip, port, f"ASSIGN {jobid} {taskid} {dur} {MY_IP}")
+        rpc_count += 1
+        if not ok:
+            mark_dead((ip, port))
+    return rpc_count
 
-    results = {
+
+############################################################
+# ARRIVAL PROCESS
+############################################################
+def job_duration():
+    # 10% heavy jobs
+    heavy = (random.randint(1, 10) == 1)
+    return 400 if heavy else 30
+
+
+def make_arrivals(kind, jobs, rate=10.0, trace=None):
+    """List of (offset_s, dur_ms) per job.
+
+    closed  : no arrival time; each job is submitted as soon as a slot frees
+    poisson : exponential inter-arrivals at `rate` jobs/s
+    trace   : one job per line, "<arrival_s> [dur_ms]" (comma or space separated)
+    """
+    if kind == "trace":
+        out = []
+        with open(trace) as f:
+            for line in f:
+                cols = line.replace(",", " ").split()
+                if not cols or cols[0].startswith("#"):
+                    continue
+                dur = int(float(cols[1])) if len(cols) > 1 else job_duration()
+                out.append((float(cols[0]), dur))
+        return out[:jobs] if jobs else out
+
+    if kind == "closed":
+        return [(None, job_duration()) for _ in range(jobs)]
+
+    out, t = [], 0.0
+    for _ in range(jobs):
+        t += random.expovariate(rate)
+        out.append((t, job_duration()))
+    return out
+
+
+def new_results():
+    del rpc_latencies[:]
+    return {
         "wait": [],
         "service": [],
         "response": [],
-        "rpc": []
+        "rpc": [],
+        "rpc_latency": [],
+        "decision": [],
+        "admission": [],
+        "queue_wait": [],
+        "replaced": [],
+        "pulls": 0,
+        "noops": 0,
+        "makespan": 0.0
     }
 
-    for job in range(jobs):
-        jobid = f"J{job}"
 
-        # 10% heavy jobs
-        heavy = (random.randint(1, 10) == 1)
-        dur = 400 if heavy else 30
+def record(results, arrive, start, job, decision, dur, rpc_count, replaced=0):
+    completion = (job["end"] - start) * 1000
+    results["response"].append(completion)
+    results["service"].append(dur)
+    results["wait"].append(completion - dur)
+    results["rpc"].append(rpc_count)     # worker GETTASKs: results["pulls"]
+    results["decision"].append(decision)
+    results["admission"].append((start - (arrive or start)) * 1000)
+    results["queue_wait"].extend(job["waits"])
+    results["replaced"].append(replaced)
+
+
+############################################################
+# MAIN SCHEDULER LOGIC
+############################################################
+def schedule_job(workers, mode, jobid, m, d, dur, reservations):
+    """Place the m tasks of one job (blocking RPCs); returns the RPC count.
+    Late binding fills `reservations` with (rid, ip, port)."""
+    rpc_count = 0
+
+    ###################################################################
+    # 1. BATCH SAMPLING
+    ###################################################################
+    if mode == "batch":
 
-        start_time = time.time()
+        # Sample d*m workers (or all if fewer)
+        sample = sample_workers(workers, d*m)
 
-        # Prepare DONE wait events
-        local_events = []
+        # PROBE phase
+        loads = probe_loads(sample)
+        rpc_count += len(sample)
+
+        # Choose m least-loaded (reused cyclically if too few answered)
+        loads.sort()
+        chosen = [w for (_, w) in loads[:m]] or sample
+        tracker.expect(jobid, [f"T{t}" for t in range(m)])
+
+        # ASSIGN phase (immediate execution)
         for t in range(m):
-            evt = threading.Event()
-            with lock:
-                done_events[(jobid, f"T{t}")] = evt
-            local_events.append(evt)
-
-        rpc_count = 0
-
-        ###################################################################
-        # 1. BATCH SAMPLING
-        ###################################################################
-        if mode == "batch":
-
-            # Sample d*m workers (or all if fewer)
-            sample = random.sample(workers, min(d*m, len(workers)))
-
-            # PROBE phase
-            loads = []
-            for (ip, port) in sample:
-                ok, rep = rpc(ip, port, "PROBE")
-                rpc_count += 1
-                q = int(rep.split()[1]) if ok and rep.startswith("Q") else 999999
-                loads.append((q, (ip, port)))
-
-            # Choose m least-loaded
-            loads.sort()
-            chosen = [w for (_, w) in loads[:m]]
-
-            # ASSIGN phase (immediate execution)
-            for t in range(m):
-                ip, port = chosen[t]
-                rpc(ip, port, f"ASSIGN {jobid} T{t} {dur} {MY_IP}")
-                rpc_count += 1
-
-        ###################################################################
-        # 2. LATE BINDING & 3. LATE BINDING + PROACTIVE CANCELLATION
-        ###################################################################
-        elif mode in ("late", "latepro"):
-
-            sample = random.sample(workers, min(d*m, len(workers)))
-            reservations = []   # list of (rid, ip, port, taskid)
-
-            # REQUEST phase (RESERVATIONS)
-            for t, (ip, port) in enumerate(sample):
-                taskid = f"T{t}"
-                ok, rep = rpc(ip, port, f"REQUEST {jobid} {taskid} {dur} {MY_IP}")
-                rpc_count += 1
-                if ok and rep.startswith("RID"):
-                    rid = rep.split()[1]
-                    reservations.append((rid, ip, port, taskid))
-
-            # CHOOSE m reservations
-            chosen = reservations[:m]
-
-            # ASSIGN_RID selected reservations
-            for (rid, ip, port, taskid) in chosen:
-                rpc(ip, port, f"ASSIGN_RID {rid}")
-                rpc_count += 1
-
-            # PROACTIVE CANCELLATION for leftover reservations
-            if mode == "latepro":
-                for (rid, ip, port, taskid) in reservations[m:]:
-                    rpc(ip, port, f"CANCEL {rid}")
-                    rpc_count += 1
-
-        ###################################################################
-        # WAIT FOR ALL TASKS TO COMPLETE
-        ###################################################################
-        for evt in local_events:
-            evt.wait()
-
-        end_time = time.time()
-        completion = (end_time - start_time) * 1000
-
-        results["response"].append(completion)
-        results["service"].append(dur)
-        results["wait"].append(completion - dur)
-        results["rpc"].append(rpc_count)
+            ip, port = chosen[t % len(chosen)]
+            ok, _ = rpc(ip, port, f"ASSIGN {jobid} T{t} {dur} {MY_IP}")
+            rpc_count += 1
+            if not ok:
+                mark_dead((ip, port))   # the task is re-placed after TASK_TIMEOUT
+
+    ###################################################################
+    # 2. LATE BINDING & 3. LATE BINDING + PROACTIVE CANCELLATION
+    ###################################################################
+    elif mode in ("late", "latepro"):
+
+        sample = sample_workers(workers, d*m)
+
+        # REQUEST phase: reservations only; each worker pulls a task with
+        # GETTASK when the reservation reaches one of its free slots
+        for (ip, port) in sample:
+            ok, rep = rpc(ip, port, f"REQUEST {jobid} {MY_IP}")
+            rpc_count += 1
+            if ok and rep.startswith("RID"):
+                reservations.append((rep.split()[1], ip, port))
+                tracker.reserve(rep.split()[1])
+            else:
+                mark_dead((ip, port))
+
+        # Fewer reservations than tasks: place the surplus directly
+        for (ip, port) in direct_targets(sample, reservations, m):
+            task = tracker.take(jobid)
+            if task is None:
+                break
+            ok, _ = rpc(ip, port, f"ASSIGN {jobid} {task[0]} {task[1]} {MY_IP}")
+            rpc_count += 1
+            if not ok:
+                mark_dead((ip, port))
+
+    return rpc_count
+
+
+def direct_targets(sample, reservations, m):
+    """Workers for the tasks no reservation was obtained for."""
+    used = {(ip, port) for (_, ip, port) in reservations}
+    spare = [w for w in sample if w not in used] or sample
+    return [spare[t % len(spare)] for t in range(m - len(reservations))]
+
+
+def cancel_unused(jobid, reservations):
+    """PROACTIVE CANCELLATION: drop reservations no task was bound to."""
+    used = tracker.used(jobid)
+    rpc_count = 0
+    for (rid, ip, port) in reservations:
+        if rid not in used:
+            rpc(ip, port, f"CANCEL {rid}")
+            tracker.resolve(rid)
+            rpc_count += 1
+    return rpc_count
+
+
+def job_tasks(mode, m, dur):
+    """Unlaunched tasks handed to the tracker (late binding only)."""
+    return [] if mode == "batch" else [(f"T{t}", dur) for t in range(m)]
+
+
+def run_job(workers, mode, jobid, m, d, dur, arrive, results, slots):
+    start_time = time.time()
+    evt = threading.Event()
+    launched = threading.Event()
+    tracker.open(jobid, evt.set, job_tasks(mode, m, dur), launched.set)
+
+    reservations = []
+    rpc_count = schedule_job(workers, mode, jobid, m, d, dur, reservations)
+    decision = (time.time() - start_time) * 1000
+
+    # Lost tasks, reservations or DONEs: after TASK_TIMEOUT every pending
+    # task is placed again (overdue() also launches the unlaunched ones)
+    replaced = 0
+    if mode == "latepro":
+        while not launched.wait(TASK_TIMEOUT):
+            overdue = tracker.overdue(jobid)
+            replaced += len(overdue)
+            rpc_count += replace_tasks(workers, jobid, d, dur, overdue)
+        rpc_count += cancel_unused(jobid, reservations)
 
     ###################################################################
-    # PRINT FINAL SUMMARY FOR THIS MODE
+    # WAIT FOR ALL TASKS TO COMPLETE
     ###################################################################
+    while not evt.wait(TASK_TIMEOUT):
+        overdue = tracker.overdue(jobid)
+        replaced += len(overdue)
+        rpc_count += replace_tasks(workers, jobid, d, dur, overdue)
+    record(results, arrive, start_time, tracker.close(jobid),
+           decision, dur, rpc_count, replaced)
+    slots.release()
+
+
+def run_scheduler(workers, mode="batch", jobs=100, m=3, d=2,
+                  arrivals=None, max_outstanding=1):
+    """Submit jobs at their arrival offsets, keeping at most
+    `max_outstanding` in flight (1 = the original job-at-a-time loop)."""
+    if arrivals is None:
+        arrivals = make_arrivals("closed", jobs)
+    results = new_results()
+    pulls0, noops0 = tracker.pulls, tracker.noops
+    slots = threading.BoundedSemaphore(max_outstanding)
+    threads = []
+
+    t0 = time.time()
+    for job, (offset, dur) in enumerate(arrivals):
+        arrive = None
+        if offset is not None:
+            arrive = t0 + offset
+            delay = arrive - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        slots.acquire()
+
+        th = threading.Thread(target=run_job, daemon=True,
+                              args=(workers, mode, f"J{job}", m, d, dur,
+                                    arrive, results, slots))
+        th.start()
+        threads.append(th)
+
+    for th in threads:
+        th.join()
+    results["makespan"] = time.time() - t0
+    count_pulls(results, pulls0, noops0)
+
+    results["rpc_latency"] = list(rpc_latencies)
+    print_summary(mode, results)
+    return results
+
+
+def count_pulls(results, pulls0, noops0):
+    """GETTASKs of this run, once the last reservations were pulled (the
+    NOOPs of a job often arrive after it finished)."""
+    tracker.settle(TASK_TIMEOUT if TASK_TIMEOUT is not None else SETTLE_S)
+    results["pulls"] = tracker.pulls - pulls0
+    results["noops"] = tracker.noops - noops0
+
+
+def print_summary(mode, results):
     print(f"\n=== {mode.upper()} — RESULTS ===")
-    print(f"Avg completion time: {mean(results['response']):.2f} ms")
+    resp = results["response"]
+    print(f"Avg completion time: {mean(resp):.2f} ms")
+    if len(resp) > 1:
+        q = quantiles(resp, n=100)
+        print(f"Completion p50/p95/p99: {q[49]:.2f} / {q[94]:.2f} / {q[98]:.2f} ms")
     print(f"Avg wait time:        {mean(results['wait']):.2f} ms")
     print(f"Avg service time:     {mean(results['service']):.2f} ms")
-    print(f"Avg RPC per job:      {mean(results['rpc']):.2f}")
+    if results["queue_wait"]:
+        print(f"Avg task queue wait:  {mean(results['queue_wait']):.2f} ms "
+              f"(max {max(results['queue_wait']):.2f} ms, reported by workers)")
+    print(f"Avg RPC per job:      {(sum(results['rpc']) + results['pulls']) / len(resp):.2f}")
+    if results["pulls"]:
+        print(f"  worker GETTASKs:    {results['pulls'] / len(resp):.2f} per job "
+              f"({results['noops']} NOOP)")
+    lat = results["rpc_latency"]
+    if lat:
+        p99 = quantiles(lat, n=100)[98] if len(lat) > 1 else lat[0]
+        print(f"Avg RPC latency:      {mean(lat):.3f} ms  "
+              f"(p99 {p99:.3f} ms, {'pooled' if USE_POOL else 'one-shot'})")
+    replaced = sum(results["replaced"])
+    if replaced:
+        print(f"Re-placed tasks:      {replaced} (no DONE within {TASK_TIMEOUT:g} s), "
+              f"{len(blacklist)} workers blacklisted at some point")
+    print(f"Avg decision latency: {mean(results['decision']):.2f} ms")
+    print(f"Avg admission delay:  {mean(results['admission']):.2f} ms")
+    if results["makespan"] > 0:
+        print(f"Throughput:           {len(resp) / results['makespan']:.2f} jobs/s")
 
+
+############################################################
+# ASYNCIO ENGINE (all probes / REQUESTs of a job in flight at once)
+############################################################
+class LoopEvent:
+    """threading.Event stand-in: listen_done's set() wakes an asyncio waiter."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.evt = asyncio.Event()
+
+    def set(self):
+        self.loop.call_soon_threadsafe(self.evt.set)
+
+    async def wait(self, timeout=None):
+        """True once set, False after `timeout` s (like threading.Event)."""
+        try:
+            await asyncio.wait_for(self.evt.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+async def arpc(pool, ip, port, message):
+    """asyncio counterpart of rpc(); returns (ok, reply_string)."""
+    t0 = time.perf_counter()
+    ok, reply = await pool.call(ip, port, message)
+    rpc_latencies.append((time.perf_counter() - t0) * 1000)
+    return ok, reply
+
+
+async def fan_out(pool, calls, deadline):
+    """Send every (ip, port, message) at once and wait at most `deadline`
+    seconds. Returns the tasks; the ones not done yet are late replies."""
+    tasks = [asyncio.ensure_future(arpc(pool, ip, port, msg))
+             for (ip, port, msg) in calls]
+    if tasks:
+        await asyncio.wait(tasks, timeout=deadline)
+    return tasks
+
+
+def reply_of(task, prefix):
+    """Reply text of a finished fan-out task, or None (late / failed)."""
+    if not task.done():
+        return None
+    ok, rep = task.result()
+    return rep if ok and rep.startswith(prefix) else None
+
+
+def loads_of(tasks, sample):
+    """(q or None, worker) per fan-out probe. A probe that failed outright
+    blacklists its worker and is left out; a late one counts as unknown."""
+    loads = []
+    for task, w in zip(tasks, sample):
+        rep = reply_of(task, "Q")
+        if rep is None and task.done():
+            mark_dead(w)
+            continue
+        loads.append((int(rep.split()[1]) if rep else None, w))
+    return loads or [(None, w) for w in sample]
+
+
+async def replace_tasks_async(pool, workers, jobid, d, dur, deadline, taskids):
+    """replace_tasks() with each task's probes in flight at once."""
+    rpc_count = 0
+    for taskid in taskids:
+        sample = sample_workers(workers, d)
+        tasks = await fan_out(pool, [(ip, port, "PROBE") for (ip, port) in sample],
+                              deadline)
+        ip, port = rank_by_load(loads_of(tasks, sample))[0][1]
+        ok, _ = await arpc(pool, ip, port, f"ASSIGN {jobid} {taskid} {dur} {MY_IP}")
+        rpc_count += len(tasks) + 1
+        if not ok:
+            mark_dead((ip, port))
+    return rpc_count
+
+
+def rank_by_load(loads):
+    """Sort (q or None, worker) pairs; unknown loads count as the mean of
+    the known ones instead of being pushed to the back."""
+    known = [q for (q, _) in loads if q is not None]
+    guess = mean(known) if known else 0
+    return sorted(loads, key=lambda x: (guess if x[0] is None else x[0],
+                                        x[0] is None))
+
+
+async def schedule_job_async(pool, workers, mode, jobid, m, d, dur, deadline,
+                             reservations):
+    """Place one job; returns the RPC count. Late binding fills
+    `reservations` with (rid, ip, port)."""
+    rpc_count = 0
+    sample = sample_workers(workers, d*m)
+
+    if mode == "batch":
+        tasks = await fan_out(pool, [(ip, port, "PROBE") for (ip, port) in sample],
+                              deadline)
+        rpc_count += len(tasks)
+
+        chosen = [w for (_, w) in rank_by_load(loads_of(tasks, sample))[:m]]
+
+        tracker.expect(jobid, [f"T{t}" for t in range(m)])
+        assigns = [(ip, port, f"ASSIGN {jobid} T{t} {dur} {MY_IP}")
+                   for t, (ip, port) in ((t, chosen[t % len(chosen)]) for t in range(m))]
+        await asyncio.gather(*[arpc(pool, *a) for a in assigns])
+        rpc_count += len(assigns)
+        return rpc_count
+
+    # late / latepro: all REQUESTs at once; workers pull tasks with GETTASK
+    calls = [(ip, port, f"REQUEST {jobid} {MY_IP}") for (ip, port) in sample]
+    tasks = await fan_out(pool, calls, deadline)
+    rpc_count += len(tasks)
+
+    for task, (ip, port) in zip(tasks, sample):
+        rep = reply_of(task, "RID")
+        if rep:
+            reservations.append((rep.split()[1], ip, port))
+            tracker.reserve(rep.split()[1])
+        elif task.done():
+            mark_dead((ip, port))
+        else:
+            # still a valid reservation when it shows up after the deadline
+            task.add_done_callback(
+                lambda tk, ip=ip, port=port: late_reservation(
+                    pool, jobid, mode, reservations, ip, port, tk))
+
+    # not enough reservations in time: place the surplus directly
+    direct = []
+    for (ip, port) in direct_targets(sample, reservations, m):
+        t = tracker.take(jobid)
+        if t is None:
+            break
+        direct.append((ip, port, f"ASSIGN {jobid} {t[0]} {t[1]} {MY_IP}"))
+    await asyncio.gather(*[arpc(pool, *c) for c in direct])
+    rpc_count += len(direct)
+
+    return rpc_count
+
+
+def late_reservation(pool, jobid, mode, reservations, ip, port, task):
+    ok, rep = task.result()
+    if not (ok and rep.startswith("RID")):
+        return
+    rid = rep.split()[1]
+    tracker.reserve(rid)
+    if mode == "latepro" and tracker.all_launched(jobid):
+        tracker.resolve(rid)
+        asyncio.ensure_future(arpc(pool, ip, port, f"CANCEL {rid}"))
+    else:
+        reservations.append((rid, ip, port))
+
+
+async def cancel_unused_async(pool, jobid, reservations):
+    used = tracker.used(jobid)
+    cancels = [(ip, port, f"CANCEL {rid}")
+               for (rid, ip, port) in reservations if rid not in used]
+    for (_, _, msg) in cancels:
+        tracker.resolve(msg.split()[1])
+    await asyncio.gather(*[arpc(pool, *c) for c in cancels])
+    return len(cancels)
+
+
+async def run_job_async(pool, workers, mode, jobid, m, d, dur, deadline,
+                        arrive, results, slots):
+    start_time = time.time()
+    loop = asyncio.get_running_loop()
+    evt, launched = LoopEvent(loop), LoopEvent(loop)
+    tracker.open(jobid, evt.set, job_tasks(mode, m, dur), launched.set)
+
+    reservations = []
+    rpc_count = await schedule_job_async(pool, workers, mode, jobid, m, d,
+                                         dur, deadline, reservations)
+    decision = (time.time() - start_time) * 1000
+
+    # as run_job(): place pending tasks again after TASK_TIMEOUT
+    replaced = 0
+    if mode == "latepro":
+        while not await launched.wait(TASK_TIMEOUT):
+            overdue = tracker.overdue(jobid)
+            replaced += len(overdue)
+            rpc_count += await replace_tasks_async(pool, workers, jobid, d, dur,
+                                                   deadline, overdue)
+        rpc_count += await cancel_unused_async(pool, jobid, reservations)
+
+    while not await evt.wait(TASK_TIMEOUT):
+        overdue = tracker.overdue(jobid)
+        replaced += len(overdue)
+        rpc_count += await replace_tasks_async(pool, workers, jobid, d, dur,
+                                               deadline, overdue)
+    record(results, arrive, start_time, tracker.close(jobid),
+           decision, dur, rpc_count, replaced)
+    slots.release()
+
+
+async def run_scheduler_async(workers, mode="batch", jobs=100, m=3, d=2,
+                              deadline_ms=100, arrivals=None, max_outstanding=1):
+    pool = AsyncConnectionPool(timeout=1.0)
+    # open every worker connection up front so job 0 doesn't pay for it
+    await asyncio.gather(*[pool.get(ip, port) for (ip, port) in workers],
+                         return_exceptions=True)
+    if arrivals is None:
+        arrivals = make_arrivals("closed", jobs)
+    results = new_results()
+    pulls0, noops0 = tracker.pulls, tracker.noops
+    slots = asyncio.Semaphore(max_outstanding)
+    running = []
+
+    t0 = time.time()
+    for job, (offset, dur) in enumerate(arrivals):
+        arrive = None
+        if offset is not None:
+            arrive = t0 + offset
+            delay = arrive - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await slots.acquire()
+
+        running.append(asyncio.ensure_future(run_job_async(
+            pool, workers, mode, f"J{job}", m, d, dur, deadline_ms / 1000.0,
+            arrive, results, slots)))
+
+    await asyncio.gather(*running)
+    results["makespan"] = time.time() - t0
+    await asyncio.get_running_loop().run_in_executor(
+        None, count_pulls, results, pulls0, noops0)
+
+    pool.close()
+    results["rpc_latency"] = list(rpc_latencies)
+    print_summary(mode, results)
     return results
 
 
@@ -184,7 +799,28 @@ if __name__ == "__main__":
     parser.add_argument("--jobs", type=int, default=100)
     parser.add_argument("--tasks", type=int, default=3)
     parser.add_argument("--probe", type=int, default=2)
+    parser.add_argument("--no-pool", action="store_true",
+                        help="open a new TCP connection per RPC (old behaviour)")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads",
+                        help="asyncio issues all probes/REQUESTs of a job at once")
+    parser.add_argument("--deadline", type=float, default=100.0,
+                        help="per-job probe/REQUEST deadline in ms (asyncio engine)")
+    parser.add_argument("--arrival", choices=["closed", "poisson", "trace"], default="closed",
+                        help="closed = next job only after the previous one (default)")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Poisson arrival rate in jobs/s")
+    parser.add_argument("--trace", help="arrival trace: '<arrival_s> [dur_ms]' per line")
+    parser.add_argument("--max-outstanding", type=int, default=None,
+                        help="jobs in flight at once (default 1 closed, 64 open-loop)")
+    parser.add_argument("--task-timeout", type=float, default=10000.0,
+                        help="ms without all of a job's DONEs before its pending tasks "
+                             "are placed again (0 = wait forever)")
+    parser.add_argument("--blacklist", type=float, default=5000.0,
+                        help="ms a worker that failed an RPC is left out of samples")
     args = parser.parse_args()
+    USE_POOL = not args.no_pool
+    TASK_TIMEOUT = args.task_timeout / 1000.0 if args.task_timeout > 0 else None
+    BLACKLIST_S = args.blacklist / 1000.0
 
     # Parse workers list
     workers = []
@@ -196,5 +832,16 @@ if __name__ == "__main__":
     threading.Thread(target=listen_done, daemon=True).start()
     time.sleep(0.2)
 
+    arrivals = make_arrivals(args.arrival, args.jobs, args.rate, args.trace)
+    outstanding = args.max_outstanding
+    if outstanding is None:
+        outstanding = 1 if args.arrival == "closed" else 64
+
     # Run scheduler
-    run_scheduler(workers, args.mode, args.jobs, args.tasks, args.probe)
+    if args.engine == "asyncio":
+        asyncio.run(run_scheduler_async(workers, args.mode, args.jobs,
+                                        args.tasks, args.probe, args.deadline,
+                                        arrivals, outstanding))
+    else:
+        run_scheduler(workers, args.mode, args.jobs, args.tasks, args.probe,
+                      arrivals, outstanding)
@@ -17,15 +17,18 @@ def stop_workers(procs):
     for p in procs:
         p.terminate()
 
-def run(mode):
+def run(mode, extra=()):
     worker_list=",".join([f"127.0.0.1:{BASE+i}" for i in range(WORKERS)])
-    print(f"\nRunning mode = {mode}")
+    print(f"\nRunning mode = {mode} {' '.join(extra)}")
     subprocess.run([sys.executable,"scheduler.py","--workers",worker_list,
-                    "--mode",mode,"--jobs","100"])
+                    "--mode",mode,"--jobs","100",*extra])
 
 if __name__=="__main__":
+    # --compare-pool: rerun every mode with one-shot RPCs at the same job count
+    compare = "--compare-pool" in sys.argv
     procs=start_workers()
-    run("batch")
-    run("late")
-    run("latepro")
+    for mode in ("batch","late","latepro"):
+        run(mode)
+        if compare:
+            run(mode, ["--no-pool"])
     stop_workers(procs)
@@ -3,6 +3,7 @@ import random
 import statistics
 import argparse
 import uuid
+import heapq
 
 
 def ms(x):
@@ -13,13 +14,18 @@ def ms(x):
 # WORKER (Unknown task durations — Sparrow model)
 # ============================================================
 class Worker:
-    def __init__(self, env, wid, net_delay):
+    # slots=None: every bound task starts at once. slots=k: at most k run,
+    # the rest wait FIFO by the time they reached the worker.
+    def __init__(self, env, wid, net_delay, slots=None):
         self.env = env
         self.id = wid
         self.net = net_delay
+        self.slots = slots
 
         self.running = 0
         self.reservations = {}
+        self.queue = []            # heap: (assigned_at, seq, jobid, tid, dur, sched)
+        self.seq = 0
 
         # Metrics
         self.busy_time = 0
@@ -34,12 +40,11 @@ class Worker:
     # RPC handlers
     # ---------------------------------------------------------
     def handle_probe(self):
-        return f"Q {self.running + len(self.reservations)}"
+        return f"Q {self.running + len(self.queue) + len(self.reservations)}"
 
     def handle_assign(self, jobid, tid, sched):
         dur = self.sample_duration()
-        self.running += 1
-        self.env.process(self._exec(jobid, tid, dur, sched, assigned_at=self.env.now))
+        self._enqueue(jobid, tid, dur, sched, self.env.now)
         return "OK"
 
     def handle_request(self, jobid, tid, sched):
@@ -53,17 +58,33 @@ class Worker:
             return "ERR"
 
         jobid, tid, dur, sched, req_time = self.reservations.pop(rid)
-        self.running += 1
-
-        self.env.process(
-            self._exec(jobid, tid, dur, sched, assigned_at=req_time)
-        )
+        self._enqueue(jobid, tid, dur, sched, req_time)
         return "OK"
 
     def handle_cancel(self, rid):
         self.reservations.pop(rid, None)
         return "CANCELLED"
 
+    # ---------------------------------------------------------
+    # Slots
+    # ---------------------------------------------------------
+    def _enqueue(self, jobid, tid, dur, sched, assigned_at):
+        if self.slots is None or self.running < self.slots:
+            self._start(jobid, tid, dur, sched, assigned_at)
+        else:
+            heapq.heappush(self.queue, (assigned_at, self.seq, jobid, tid, dur, sched))
+            self.seq += 1
+
+    def _start(self, jobid, tid, dur, sched, assigned_at):
+        self.running += 1
+        self.env.process(self._exec(jobid, tid, dur, sched, assigned_at=assigned_at))
+
+    def _release(self):
+        self.running -= 1
+        if self.queue:
+            assigned_at, _, jobid, tid, dur, sched = heapq.heappop(self.queue)
+            self._start(jobid, tid, dur, sched, assigned_at)
+
     # ---------------------------------------------------------
     # Task execution with detailed metrics
     # ---------------------------------------------------------
@@ -76,7 +97,7 @@ class Worker:
         yield self.env.timeout(ms(dur))
         end = self.env.now
 
-        self.running -= 1
+        self._release()
 
         # Busy time metric
         self.busy_time += (end - start)
@@ -298,11 +319,11 @@ class Scheduler:
 # ============================================================
 # RUN SIMULATION
 # ============================================================
-def run_sim(workers, schedulers, jobs, m, d, nd, mode, seed):
+def run_sim(workers, schedulers, jobs, m, d, nd, mode, seed, slots=None):
     random.seed(seed)
     env = simpy.Environment()
 
-    wlist = [Worker(env, i, nd) for i in range(workers)]
+    wlist = [Worker(env, i, nd, slots) for i in range(workers)]
     slist = [
         Scheduler(env, f"S{i}", wlist, nd, mode,
                   jobs, m, d)
@@ -356,6 +377,8 @@ if __name__ == "__main__":
     p.add_argument("--mode", choices=["batch", "late", "latepro"], default="batch")
     p.add_argument("--ndelay", type=float, default=1.0)
     p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--slots", type=int, default=None,
+                   help="execution slots per worker (default: unlimited)")
     a = p.parse_args()
 
     print("\n===================================================")
@@ -369,11 +392,12 @@ if __name__ == "__main__":
     print(f"Mode               : {a.mode}")
     print(f"Network Delay      : {a.ndelay} ms")
     print(f"Seed               : {a.seed}")
+    print(f"Slots per Worker   : {a.slots or 'unlimited'}")
     print("===================================================\n")
 
     r = run_sim(a.workers, a.schedulers, a.jobs,
                 a.tasks, a.probe, a.ndelay,
-                a.mode, a.seed)
+                a.mode, a.seed, a.slots)
 
     print("=============== RESULTS =================")
     print(f"Avg Job Completion Time  : {r['completion']:.2f} ms")
@@ -1,103 +1,293 @@
 #!/usr/bin/env python3
-import sys, socket, threading, time, uuid
+import sys, socket, asyncio, uuid, time, argparse, random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from rpc_pool import encode, decode, AsyncConnectionPool
 
+############################################################
+# WORKER STATE (only touched from the event loop, so no lock)
+############################################################
 running_tasks = 0
-reservations = {}
-lock = threading.Lock()
-
-def send_done(sched_ip, jobid, taskid):
-    """Notify scheduler that a task is finished."""
-    try:
-        s = socket.socket()
-        s.connect((sched_ip, 9200))
-        s.sendall(f"DONE {jobid} {taskid}\n".encode())
-        s.close()
-    except:
-        pass
-
-def run_task(duration, jobid, taskid, sched_ip):
+reservations = {}     # rid -> its run_queue entry (until dequeued or cancelled)
+run_queue = deque()   # (rid, jobid, taskid, dur, sched_ip, enqueued_at); a
+                      # reservation has rid set and taskid/dur None
+sched_pool = None     # persistent connections back to schedulers (GETTASK, DONE)
+done_batcher = None
+DONE_BATCH = 64       # --done-batch: DONE entries per frame
+DONE_FLUSH_MS = 2.0   # --done-flush: max time a DONE waits to be sent
+SLOTS = 1             # --slots: tasks that may execute at once
+tasks = set()         # keeps background coroutines (DONE sends, faults) referenced
+executor = None       # --pool: runs CPU-bound payloads off the loop
+PAYLOAD = "sleep"     # "sleep" simulates a task, "cpu" really burns it
+executing = set()     # run_task / pull_task tasks, cancelled by a crash
+
+# fault injection (off by default)
+DROP = 0.0            # --drop: probability an incoming frame or DONE frame is lost
+DOWN = False          # crashed (--mtbf): frames are ignored until the restart
+PARTITIONED = False   # cut off (--partition-every): tasks run, nothing gets through
+
+
+def burn(duration):
+    """CPU-bound payload: spin for `duration` ms."""
+    end = time.perf_counter() + duration / 1000.0
+    x = 0
+    while time.perf_counter() < end:
+        x += 1
+    return x
+
+
+class DoneBatcher:
+    """Coalesces DONE notifications per scheduler into one frame,
+    "DONE <jobid> <taskid> <wait_ms> [<jobid> <taskid> <wait_ms> ...]",
+    sent over the persistent scheduler connection. A batch is flushed when
+    it reaches DONE_BATCH entries or DONE_FLUSH_MS after its first entry."""
+
+    def __init__(self):
+        self.buffers = {}     # sched_ip -> [entry, ...]
+
+    def add(self, sched_ip, jobid, taskid, wait_ms):
+        buf = self.buffers.setdefault(sched_ip, [])
+        buf.append(f"{jobid} {taskid} {wait_ms:.3f}")
+        if len(buf) >= DONE_BATCH:
+            self.flush(sched_ip)
+        elif len(buf) == 1:
+            asyncio.get_running_loop().call_later(
+                DONE_FLUSH_MS / 1000.0, self.flush, sched_ip)
+
+    def flush(self, sched_ip):
+        buf = self.buffers.pop(sched_ip, None)
+        if buf and not lost():
+            task = asyncio.get_running_loop().create_task(
+                sched_pool.send(sched_ip, 9200, "DONE " + " ".join(buf)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+
+async def run_task(duration, jobid, taskid, sched_ip, wait_ms):
     global running_tasks
-    with lock:
+
+    if PAYLOAD == "cpu":
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, burn, duration)
+    else:
+        await asyncio.sleep(duration / 1000.0)
+
+    running_tasks -= 1
+    dispatch()
+    done_batcher.add(sched_ip, jobid, taskid, wait_ms)
+
+
+def enqueue(duration, jobid, taskid, sched_ip, rid=None):
+    """Queue a task (or a reservation when rid is set) behind everything
+    already waiting for a slot."""
+    entry = (rid, jobid, taskid, duration, sched_ip, time.perf_counter())
+    if rid is not None:
+        reservations[rid] = entry
+    run_queue.append(entry)
+    dispatch()
+
+
+def dispatch():
+    """Start queued work in FIFO order while execution slots are free."""
+    global running_tasks
+    loop = asyncio.get_running_loop()
+    while run_queue and running_tasks < SLOTS:
+        rid, jobid, taskid, duration, sched_ip, enqueued_at = run_queue.popleft()
         running_tasks += 1
+        if rid is not None:
+            # late binding: the slot is ours, now ask for the actual task
+            reservations.pop(rid, None)
+            coro = pull_task(rid, jobid, sched_ip, enqueued_at)
+        else:
+            wait_ms = (time.perf_counter() - enqueued_at) * 1000
+            coro = run_task(duration, jobid, taskid, sched_ip, wait_ms)
+        task = loop.create_task(coro)
+        executing.add(task)
+        task.add_done_callback(executing.discard)
+
+
+async def pull_task(rid, jobid, sched_ip, enqueued_at):
+    """A reservation reached a free slot: fetch the job's next unlaunched
+    task from its scheduler, or give the slot back on NOOP."""
+    global running_tasks
+    if lost():
+        ok, rep = False, ""
+    else:
+        ok, rep = await sched_pool.call(sched_ip, 9200, f"GETTASK {jobid} {rid}")
+    data = rep.split() if ok else []
+    if data and data[0] == "TASK":
+        taskid, duration = data[1], int(data[2])
+        wait_ms = (time.perf_counter() - enqueued_at) * 1000
+        await run_task(duration, jobid, taskid, sched_ip, wait_ms)
+        return
+
+    running_tasks -= 1
+    dispatch()
+
+
+############################################################
+# FAULT INJECTION
+############################################################
+def lost():
+    """Does a frame to or from a scheduler get lost right now?"""
+    return DOWN or PARTITIONED or (DROP > 0 and random.random() < DROP)
 
-    time.sleep(duration / 1000.0)
-
-    with lock:
-        running_tasks -= 1
-
-    send_done(sched_ip, jobid, taskid)
-
-def client_handler(conn, addr):
-    global reservations
-    try:
-        data = conn.recv(4096).decode().strip().split()
-        if not data:
-            conn.close()
-            return
-
-        cmd = data[0]
-
-        if cmd == "PROBE":
-            with lock:
-                q = running_tasks + len(reservations)
-            conn.sendall(f"Q {q}\n".encode())
-
-        elif cmd == "ASSIGN":
-            jobid, taskid, dur = data[1], data[2], int(data[3])
-            sched_ip = data[4]
-            threading.Thread(target=run_task,
-                             args=(dur, jobid, taskid, sched_ip),
-                             daemon=True).start()
-            conn.sendall(b"STARTED\n")
-
-        elif cmd == "REQUEST":
-            jobid, taskid, dur = data[1], data[2], int(data[3])
-            sched_ip = data[4]
-            rid = uuid.uuid4().hex[:8]
-            with lock:
-                reservations[rid] = (jobid, taskid, dur, sched_ip)
-            conn.sendall(f"RID {rid}\n".encode())
-
-        elif cmd == "ASSIGN_RID":
-            rid = data[1]
-            with lock:
-                if rid not in reservations:
-                    conn.sendall(b"ERR\n")
-                    return
-                jobid, taskid, dur, sched_ip = reservations.pop(rid)
-
-            threading.Thread(target=run_task,
-                             args=(dur, jobid, taskid, sched_ip),
-                             daemon=True).start()
-            conn.sendall(b"STARTED\n")
-
-        elif cmd == "CANCEL":
-            rid = data[1]
-            with lock:
-                reservations.pop(rid, None)
-            conn.sendall(b"CANCELLED\n")
-
-    except:
-        pass
-
-    conn.close()
-
-
-def serve(port):
-    s = socket.socket()
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind(("0.0.0.0", port))
-    s.listen(64)
 
+def crash():
+    """Lose everything: queued tasks, reservations, unsent DONEs and the
+    tasks executing now. Returns how many tasks/reservations were lost."""
+    global running_tasks, DOWN
+    DOWN = True
+    lost_work = len(run_queue) + len(executing)
+    run_queue.clear()
+    reservations.clear()
+    done_batcher.buffers.clear()
+    for task in list(executing):
+        task.cancel()
+    running_tasks = 0
+    return lost_work
+
+
+async def churn(mtbf, mttr):
+    """Crash after exp(mtbf) s, come back empty after exp(mttr) s."""
+    global DOWN
+    while True:
+        await asyncio.sleep(random.expovariate(1.0 / mtbf))
+        n = crash()
+        print(f"[worker] CRASH ({n} tasks lost)")
+        await asyncio.sleep(random.expovariate(1.0 / mttr))
+        DOWN = False
+        print("[worker] RESTART")
+        sys.stdout.flush()
+
+
+async def partitions(every, length):
+    """Every exp(every) s, cut this worker off from the schedulers for
+    `length` s. Tasks keep running; their DONEs are lost."""
+    global PARTITIONED
+    while True:
+        await asyncio.sleep(random.expovariate(1.0 / every))
+        PARTITIONED = True
+        await asyncio.sleep(length)
+        PARTITIONED = False
+
+
+############################################################
+# RPC HANDLING
+############################################################
+def handle_command(data):
+    """Execute one RPC (already split into tokens); returns the reply text."""
+    cmd = data[0]
+
+    if cmd == "PROBE":
+        return f"Q {running_tasks + len(run_queue)}"
+
+    elif cmd == "ASSIGN":
+        jobid, taskid, dur = data[1], data[2], int(data[3])
+        sched_ip = data[4]
+        enqueue(dur, jobid, taskid, sched_ip)
+        return "QUEUED"
+
+    elif cmd == "REQUEST":
+        # "REQUEST <jobid> <sched_ip>": a placeholder in the run queue; the
+        # task is only fetched (GETTASK) once it reaches a free slot
+        jobid, sched_ip = data[1], data[-1]
+        rid = uuid.uuid4().hex[:8]
+        enqueue(None, jobid, None, sched_ip, rid=rid)
+        return f"RID {rid}"
+
+    elif cmd == "CANCEL":
+        rid = data[1]
+        entry = reservations.pop(rid, None)
+        if entry is not None:
+            run_queue.remove(entry)
+        return "CANCELLED"
+
+    return "ERR"
+
+
+class RPCProtocol(asyncio.Protocol):
+    """Serves one (possibly persistent, pipelined) connection. Every frame in
+    a received chunk is handled and all replies go out in one write."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buf = b""
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data):
+        lines = (self.buf + data).split(b"\n")
+        self.buf = lines.pop()
+
+        out = []
+        for line in lines:
+            if lost():
+                continue          # no reply: the caller times out
+            rid, text = decode(line.decode())
+            data = text.split()
+            if not data:
+                continue
+            try:
+                reply = handle_command(data)
+            except (IndexError, ValueError):
+                reply = "ERR"
+            out.append(encode(rid, reply))
+        if out:
+            self.transport.write(b"".join(out))
+
+
+async def serve(port, mtbf=0.0, mttr=5.0, partition_every=0.0, partition_s=2.0):
+    global sched_pool, done_batcher
+    sched_pool = AsyncConnectionPool(timeout=1.0)
+    done_batcher = DoneBatcher()
+    loop = asyncio.get_running_loop()
+    if mtbf > 0:
+        tasks.add(loop.create_task(churn(mtbf, mttr)))
+    if partition_every > 0:
+        tasks.add(loop.create_task(partitions(partition_every, partition_s)))
+    server = await loop.create_server(RPCProtocol, "0.0.0.0", port,
+                                      reuse_address=True, backlog=1024)
     print(f"[worker] Listening on {port}")
     sys.stdout.flush()
 
-    while True:
-        conn, addr = s.accept()
-        threading.Thread(target=client_handler,
-                         args=(conn, addr), daemon=True).start()
+    async with server:
+        await server.serve_forever()
 
 
 if __name__ == "__main__":
-    port = int(sys.argv[1])
-    serve(port)
+    p = argparse.ArgumentParser()
+    p.add_argument("port", type=int)
+    p.add_argument("--slots", type=int, default=1,
+                   help="execution slots; further tasks wait in a FIFO run queue")
+    p.add_argument("--done-batch", type=int, default=64,
+                   help="max DONE notifications coalesced into one frame")
+    p.add_argument("--done-flush", type=float, default=2.0,
+                   help="ms a DONE may wait for its batch to fill")
+    p.add_argument("--payload", choices=["sleep", "cpu"], default="sleep",
+                   help="cpu: burn the task duration in the --pool executor")
+    p.add_argument("--pool", choices=["thread", "process"], default="thread")
+    p.add_argument("--pool-size", type=int, default=None)
+    p.add_argument("--drop", type=float, default=0.0,
+                   help="probability an incoming frame or outgoing DONE/GETTASK is lost")
+    p.add_argument("--mtbf", type=float, default=0.0,
+                   help="mean s between crashes; a crash loses all queued and running tasks")
+    p.add_argument("--mttr", type=float, default=5.0, help="mean s until restart")
+    p.add_argument("--partition-every", type=float, default=0.0,
+                   help="mean s between partitions cutting this worker off")
+    p.add_argument("--partition-s", type=float, default=2.0,
+                   help="length of a partition in s")
+    args = p.parse_args()
+
+    SLOTS = max(1, args.slots)
+    DONE_BATCH = max(1, args.done_batch)
+    DONE_FLUSH_MS = args.done_flush
+    DROP = args.drop
+    PAYLOAD = args.payload
+    if PAYLOAD == "cpu":
+        Pool = ProcessPoolExecutor if args.pool == "process" else ThreadPoolExecutor
+        executor = Pool(max_workers=args.pool_size)
+
+    asyncio.run(serve(args.port, args.mtbf, args.mttr,
+                      args.partition_every, args.partition_s))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Thread-per-connection / thread-per-task worker. Superseded by the event-loop
+# worker.py; kept as the baseline for bench_worker.py (PROBE/ASSIGN only --
+# it predates slots and worker-initiated late binding).
+import sys, socket, threading, time, uuid
+from rpc_pool import encode, decode, read_lines
+
+running_tasks = 0
+reservations = {}
+lock = threading.Lock()
+
+def send_done(sched_ip, jobid, taskid):
+    """Notify scheduler that a task is finished."""
+    try:
+        s = socket.socket()
+        s.connect((sched_ip, 9200))
+        s.sendall(f"DONE {jobid} {taskid}\n".encode())
+        s.close()
+    except:
+        pass
+
+def run_task(duration, jobid, taskid, sched_ip):
+    global running_tasks
+    with lock:
+        running_tasks += 1
+
+    time.sleep(duration / 1000.0)
+
+    with lock:
+        running_tasks -= 1
+
+    send_done(sched_ip, jobid, taskid)
+
+def handle_command(data):
+    """Execute one RPC (already split into tokens); returns the reply text."""
+    global reservations
+    cmd = data[0]
+
+    if cmd == "PROBE":
+        with lock:
+            q = running_tasks + len(reservations)
+        return f"Q {q}"
+
+    elif cmd == "ASSIGN":
+        jobid, taskid, dur = data[1], data[2], int(data[3])
+        sched_ip = data[4]
+        threading.Thread(target=run_task,
+                         args=(dur, jobid, taskid, sched_ip),
+                         daemon=True).start()
+        return "STARTED"
+
+    elif cmd == "REQUEST":
+        jobid, taskid, dur = data[1], data[2], int(data[3])
+        sched_ip = data[4]
+        rid = uuid.uuid4().hex[:8]
+        with lock:
+            reservations[rid] = (jobid, taskid, dur, sched_ip)
+        return f"RID {rid}"
+
+    elif cmd == "ASSIGN_RID":
+        rid = data[1]
+        with lock:
+            if rid not in reservations:
+                return "ERR"
+            jobid, taskid, dur, sched_ip = reservations.pop(rid)
+
+        threading.Thread(target=run_task,
+                         args=(dur, jobid, taskid, sched_ip),
+                         daemon=True).start()
+        return "STARTED"
+
+    elif cmd == "CANCEL":
+        rid = data[1]
+        with lock:
+            reservations.pop(rid, None)
+        return "CANCELLED"
+
+    return "ERR"
+
+
+def client_handler(conn, addr):
+    """Serve one (possibly persistent, pipelined) connection until EOF."""
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        for line in read_lines(conn):
+            rid, text = decode(line)
+            data = text.split()
+            if not data:
+                continue
+            try:
+                reply = handle_command(data)
+            except (IndexError, ValueError):
+                reply = "ERR"
+            conn.sendall(encode(rid, reply))
+    except OSError:
+        pass
+
+    conn.close()
+
+
+def serve(port):
+    s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(("0.0.0.0", port))
+    s.listen(64)
+
+    print(f"[worker] Listening on {port}")
+    sys.stdout.flush()
+
+    while True:
+        conn, addr = s.accept()
+        threading.Thread(target=client_handler,
+                         args=(conn, addr), daemon=True).start()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1])
+    serve(port)